@@ -31,41 +31,453 @@ Another potentially-useful toolkit is Polyglot:
 https://pypi.org/project/polyglot/
 """
 
-from objects import Term
-import spacy
+from cache import TokenCache
+from grouping import get_entity_term
+from objects import get_term
+from collections import OrderedDict
+from multiprocessing import Pool
+from os.path import basename
+from time import perf_counter
+
+# Analysis profiles indicating the pipeline components not needed by each
+# profile, these being disabled when loading a language model. Only the text,
+# part-of-speech tags and lemmas of tokens are needed for the production of
+# terms, making the parser and entity recogniser unnecessary by default.
+#
+# Components are disabled rather than excluded since the exclusion of components
+# is only supported by spaCy 3, whereas spaCy 2 does not even load the disabled
+# components of the models it employs.
+
+profiles = {
+    "tagger-only"   : ["parser", "ner", "senter", "entity_linker",
+                       "entity_ruler", "textcat"],
+    "tagger+ner"    : ["parser", "senter", "entity_linker", "textcat"],
+    "full"          : [],
+    }
+
+default_profile = "tagger-only"
+
+# The number of texts analysed together where no batch size is indicated.
+
+default_batch_size = 1000
+
+class ModelPool:
 
-nlp = None
+    """
+    A collection of language models for different languages and profiles, each
+    loaded when first needed.
+    """
+
+    def __init__(self, limit=None):
+
+        """
+        Initialise the pool, retaining no more than 'limit' models if specified
+        by discarding the least recently used models.
+        """
+
+        self.limit = limit
+        self.models = OrderedDict()
+
+    def get(self, lang="es", profile=None):
+
+        """
+        Return the language model for 'lang', employing any given analysis
+        'profile' to disable unnecessary components.
+        """
+
+        key = (lang, profile or default_profile)
+        nlp = self.models.get(key)
+
+        if nlp is not None:
+            self.models.move_to_end(key)
+            return nlp
+
+        import spacy
+        nlp = self.models[key] = spacy.load(lang, disable=profiles[key[1]])
+
+        while self.limit and len(self.models) > self.limit:
+            self.models.popitem(last=False)
+
+        return nlp
+
+# Loaded language models.
+
+pool = ModelPool()
+
+def ensure_nlp(lang="es", profile=None):
+
+    """
+    Ensure that the language model for 'lang' is loaded, employing any given
+    analysis 'profile' to disable unnecessary components, returning the model.
+    """
+
+    return pool.get(lang, profile)
 
-def ensure_nlp(lang="es"):
+def get_fragments_by_language(fragments, lang="es", lang_map=None):
 
-    "Ensure that the language model for 'lang' is loaded."
+    """
+    Return a list of (language, fragments) tuples grouping 'fragments' by the
+    language indicated for each fragment source by 'lang_map', with 'lang'
+    being used for sources absent from the mapping.
+    """
+
+    if not lang_map:
+        return [(lang, fragments)]
+
+    d = {}
+
+    for fragment in fragments:
+        fragment_lang = lang_map.get(basename(fragment.source.filename), lang)
+        if fragment_lang not in d:
+            d[fragment_lang] = []
+        d[fragment_lang].append(fragment)
+
+    return list(d.items())
+
+def get_model_name(nlp):
 
-    global nlp
-    if not nlp:
-        nlp = spacy.load(lang)
+    "Return a string identifying the name and version of the model 'nlp'."
+
+    meta = nlp.meta
+    return "%s_%s-%s" % (meta.get("lang"), meta.get("name"), meta.get("version"))
 
 def get_tokens(s, lang="es"):
 
     "Return tokens for 's'."
 
-    ensure_nlp(lang)
-    return nlp(s)
+    return ensure_nlp(lang)(s)
 
 def process_tokens(s, ops, lang="es"):
 
     "Process the tokens found by tokenising 's' with the given 'ops'."
 
+    return process_doc(get_tokens(s, lang), ops)
+
+def process_doc(doc, ops, entities=False):
+
+    """
+    Process the tokens in 'doc' with the given 'ops'. If 'entities' is set to a
+    true value, the results for the tokens in each named entity are combined
+    into a single term.
+    """
+
     l = []
-    for token in get_tokens(s, lang):
+    entity = []
+
+    for token in doc:
         t = token
         for op in ops:
             t = op(t)
             if not t:
                 break
         else:
+            if entities:
+                iob = token.ent_iob_
+
+                # Produce any entity ended by this token.
+
+                if iob != "I" and entity:
+                    l.append(get_entity_term(entity))
+                    entity = []
+
+                if iob in ("B", "I"):
+                    entity.append(t)
+                    continue
+
             l.append(t)
+
+    if entity:
+        l.append(get_entity_term(entity))
+
     return l
 
+class Analyser:
+
+    "A way of analysing fragment text using a language model."
+
+    def __init__(self, lang="es", batch_size=None, processes=1, profile=None,
+                 timings=None, cache_filename=None, lang_map=None,
+                 pretokenised=False, entities=False):
+
+        """
+        Initialise the analyser for 'lang'. If 'batch_size' is specified or if
+        'processes' is greater than one, texts are analysed in batches of the
+        indicated size (or a default size) using the indicated number of
+        processes.
+
+        Any 'profile' indicates the analysis profile governing the language
+        model components employed. If a 'timings' dictionary is specified, the
+        time spent in each component is accumulated in the dictionary and texts
+        are analysed individually.
+
+        If 'cache_filename' is specified, the tokens produced for each text are
+        retained in a token cache stored in the indicated file, and only texts
+        not found in the cache are analysed.
+
+        If 'lang_map' is specified, it maps source names to the languages of
+        the fragments from each source, with 'lang' being used for other
+        sources. The fragments for each language are analysed together.
+
+        If 'pretokenised' is set to a true value, the words of each fragment
+        are used directly as tokens instead of tokenising the fragment text,
+        with only the components of the language model pipeline being applied
+        to the words.
+
+        If 'entities' is set to a true value, the tokens in each named entity
+        recognised by the language model are combined into a single term.
+        """
+
+        self.lang = lang
+        self.batch_size = batch_size
+        self.processes = processes or 1
+        self.profile = profile or default_profile
+        self.timings = timings
+        self.cache_filename = cache_filename
+        self.lang_map = lang_map
+        self.pretokenised = pretokenised
+        self.entities = entities
+
+    def get_input(self, fragment):
+
+        "Return the input to be analysed for 'fragment'."
+
+        if self.pretokenised:
+            return fragment.words
+        else:
+            return fragment.get_text()
+
+    def get_docs(self, texts, lang=None):
+
+        """
+        Return an iterator over the documents produced by analysing 'texts' in
+        any indicated 'lang' or the default language of the analyser. Where
+        the analyser is pretokenised, each of the 'texts' is a list of words,
+        and where more than one process is also employed, lists of tokens are
+        produced instead of documents.
+        """
+
+        nlp = ensure_nlp(lang or self.lang, self.profile)
+
+        if self.pretokenised:
+            from spacy.tokens import Doc
+            make_doc = lambda words: Doc(nlp.vocab, words=words)
+        else:
+            make_doc = nlp.make_doc
+
+        if self.timings is not None:
+            return self.get_timed_docs(nlp, make_doc, texts)
+
+        # Documents made from words are only processed by the pipeline
+        # components, since spaCy 2 models only accept text.
+
+        if self.pretokenised:
+            if self.processes < 2:
+                return self.get_pipeline_docs(nlp, map(make_doc, texts))
+            else:
+                return self.get_parallel_pipeline_docs(texts, lang or self.lang)
+
+        if not self.batch_size and self.processes < 2:
+            return map(nlp, texts)
+
+        kw = {"n_process" : self.processes}
+
+        if self.batch_size:
+            kw["batch_size"] = self.batch_size
+
+        return nlp.pipe(texts, **kw)
+
+    def get_pipeline_docs(self, nlp, docs):
+
+        """
+        Return an iterator over the documents produced by applying the pipeline
+        components of 'nlp' to 'docs', processing documents in batches where a
+        batch size has been indicated and a component supports batches.
+        """
+
+        for name, component in nlp.pipeline:
+            if self.batch_size and hasattr(component, "pipe"):
+                docs = component.pipe(docs, batch_size=self.batch_size)
+            else:
+                docs = map(component, docs)
+
+        return docs
+
+    def get_parallel_pipeline_docs(self, texts, lang):
+
+        """
+        Generate token lists for 'texts', each being a list of words, analysed
+        in 'lang' by a pool of processes, with each process analysing a batch
+        of texts at a time.
+        """
+
+        batch_size = self.batch_size or default_batch_size
+        batches = map(lambda batch: (lang, self.profile, batch_size,
+                                     self.entities, batch),
+                      get_batches(texts, batch_size))
+
+        pool = Pool(self.processes)
+        try:
+            for batch_tokens in pool.imap(analyse_words, batches):
+                for tokens in batch_tokens:
+                    yield list(map(get_cached_token, tokens))
+        finally:
+            pool.close()
+            pool.join()
+
+    def get_timed_docs(self, nlp, make_doc, texts):
+
+        """
+        Generate the documents produced by analysing 'texts' with 'nlp', making
+        documents using 'make_doc' and running each component of the pipeline
+        in turn, recording the time taken.
+        """
+
+        timings = self.timings
+        label = self.pretokenised and "words" or "tokenizer"
+
+        for text in texts:
+            start = perf_counter()
+            doc = make_doc(text)
+            timings[label] += perf_counter() - start
+
+            for name, component in nlp.pipeline:
+                start = perf_counter()
+                doc = component(doc)
+                timings[name] += perf_counter() - start
+
+            yield doc
+
+    def get_cached_docs(self, texts, lang=None):
+
+        """
+        Return an iterator over token lists for 'texts' in any indicated 'lang'
+        or the default language of the analyser, obtaining the tokens for
+        previously analysed texts from the token cache and analysing only the
+        other texts. Where the analyser is pretokenised, each of the 'texts' is
+        a list of words.
+        """
+
+        lang = lang or self.lang
+        nlp = ensure_nlp(lang, self.profile)
+        cache = TokenCache(self.cache_filename, lang, get_model_name(nlp),
+                           self.entities and "ner" or None)
+
+        analysed = {}
+        missing = []
+
+        # Pretokenised texts employ keys that cannot be confused with the
+        # text of fragments, which never contains tab characters.
+
+        if self.pretokenised:
+            keys = list(map(lambda words: "\t".join(words), texts))
+        else:
+            keys = texts
+
+        try:
+            for key, text in zip(keys, texts):
+                if key not in analysed:
+                    tokens = cache.get(key)
+                    analysed[key] = tokens
+                    if tokens is None:
+                        missing.append((key, text))
+
+            docs = self.get_docs(map(lambda t: t[1], missing), lang)
+
+            for (key, text), doc in zip(missing, docs):
+                tokens = list(map(self.get_token_details, doc))
+                analysed[key] = tokens
+                cache.set(key, tokens)
+
+            cache.commit()
+
+        finally:
+            cache.close()
+
+        return map(lambda key: list(map(get_cached_token, analysed[key])),
+                   keys)
+
+    def process_fragments(self, fragments, ops):
+
+        """
+        Process the 'fragments' using the given 'ops', analysing the text of
+        all fragments in each language as a stream of documents.
+        """
+
+        ops = [init_result] + ops + [complete_result]
+
+        for lang, lang_fragments in get_fragments_by_language(fragments,
+                                        self.lang, self.lang_map):
+
+            texts = map(self.get_input, lang_fragments)
+
+            if self.cache_filename:
+                docs = self.get_cached_docs(list(texts), lang)
+            else:
+                docs = self.get_docs(texts, lang)
+
+            for fragment, doc in zip(lang_fragments, docs):
+                fragment.words = process_doc(doc, ops, self.entities)
+
+    def get_token_details(self, token):
+
+        "Return a tuple of details to be cached for 'token'."
+
+        if self.entities:
+            return (token.text, token.pos_, token.lemma_, token.ent_iob_)
+        else:
+            return (token.text, token.pos_, token.lemma_)
+
+class CachedToken:
+
+    "A token restored from a token cache."
+
+    __slots__ = ("text", "pos_", "lemma_", "ent_iob_")
+
+    def __init__(self, text, pos_, lemma_, ent_iob_=""):
+        self.text = text
+        self.pos_ = pos_
+        self.lemma_ = lemma_
+        self.ent_iob_ = ent_iob_
+
+def get_batches(l, size):
+
+    "Generate lists of no more than 'size' items from the iterable 'l'."
+
+    batch = []
+
+    for item in l:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+def analyse_words(details):
+
+    """
+    Using 'details' of the form (language, profile, batch size, entities, batch),
+    return a list of token details for each list of words in the batch, this
+    being done in a separate process.
+    """
+
+    lang, profile, batch_size, entities, batch = details
+    analyser = Analyser(lang, batch_size, profile=profile, pretokenised=True,
+                        entities=entities)
+
+    return list(map(lambda doc: list(map(analyser.get_token_details, doc)),
+                    analyser.get_docs(batch, lang)))
+
+def get_cached_token(t):
+
+    """
+    Return a token for 't', being a (text, tag, lemma) tuple or a tuple also
+    providing the entity position of the token.
+    """
+
+    return CachedToken(*t)
+
 # Processing functions.
 
 def lower_word(t):
@@ -92,6 +504,89 @@ def stem_word(t):
     else:
         return t
 
+# Stemming as an alternative to lemmatisation.
+
+# Snowball stemming algorithms for each language code.
+
+stemmer_languages = {
+    "da" : "danish",    "de" : "german",    "en" : "english",
+    "es" : "spanish",   "fi" : "finnish",   "fr" : "french",
+    "it" : "italian",   "nb" : "norwegian", "nl" : "dutch",
+    "no" : "norwegian", "pt" : "portuguese", "ru" : "russian",
+    "sv" : "swedish",
+    }
+
+class SnowballNormaliser:
+
+    "A normaliser of terms employing a Snowball stemmer."
+
+    # The tags of terms to be stemmed, as done by stem_word with lemmas.
+
+    tags = ("ADJ", "NOUN", "VERB")
+
+    def __init__(self, lang="es", lang_map=None):
+
+        """
+        Initialise the normaliser for 'lang' using the PyStemmer package. Any
+        'lang_map' maps source names to the languages of the fragments from
+        each source, with 'lang' being used for other sources.
+        """
+
+        from Stemmer import Stemmer
+
+        self.Stemmer = Stemmer
+        self.lang = lang
+        self.lang_map = lang_map
+        self.stemmers = {}
+
+    def get_stemmer(self, lang):
+
+        "Return a stemmer for 'lang'."
+
+        stemmer = self.stemmers.get(lang)
+
+        if not stemmer:
+            stemmer = self.stemmers[lang] = \
+                self.Stemmer(stemmer_languages.get(lang, lang))
+
+        return stemmer
+
+    def normalise_fragments(self, fragments):
+
+        """
+        Replace the terms in 'fragments' having the stemmed tags with terms
+        whose normalised forms are the stems of their lower-cased words, with
+        all distinct words in each language being stemmed in a single batch.
+        """
+
+        for lang, lang_fragments in get_fragments_by_language(fragments,
+                                        self.lang, self.lang_map):
+
+            self.normalise_fragments_for_language(lang_fragments, lang)
+
+    def normalise_fragments_for_language(self, fragments, lang):
+
+        "Normalise the terms in 'fragments' using the stemmer for 'lang'."
+
+        words = set()
+
+        for fragment in fragments:
+            for term in fragment.words:
+                if term.tag in self.tags:
+                    words.add(term.word.lower())
+
+        words = list(words)
+        stems = dict(zip(words, self.get_stemmer(lang).stemWords(words)))
+
+        def normalise(term):
+            if term.tag in self.tags:
+                return get_term(term.word, term.tag, stems[term.word.lower()])
+            else:
+                return term
+
+        for fragment in fragments:
+            fragment.words = list(map(normalise, fragment.words))
+
 # Internal functions for setting up and finalising results.
 
 def init_result(token):
@@ -107,7 +602,7 @@ def complete_result(t):
     "Return the eventual result from 't', this being (token, result)."
 
     token, result = t
-    return Term(token.text, token.pos_, result)
+    return get_term(token.text, token.pos_, result)
 
 # Fragment processing.
 
@@ -118,9 +613,6 @@ def process_fragment_tokens(fragments, ops, lang="es"):
     indicates the language to be used to interpret the tokens.
     """
 
-    for fragment in fragments:
-        fragment.words = process_tokens(fragment.get_text(),
-                                        [init_result] + ops + [complete_result],
-                                        lang)
+    Analyser(lang).process_fragments(fragments, ops)
 
 # vim: tabstop=4 expandtab shiftwidth=4
@@ -33,48 +33,168 @@ Produce reports describing the input data.
 
 # Input and output.
 
-from inputs import get_fragments_from_files, \
+from inputs import get_fragments_for_sources, \
+                   get_filenames_from_directory, get_filenames_from_manifest, \
+                   get_input_filenames, get_input_groups, \
                    get_list_from_file, get_map_from_file, \
-                   get_flag, get_option
+                   get_flag, get_option, get_options
+
+from cache import Cache, get_digest
+
+from serialised import get_serialised_connections
+from store import get_restored_fragments, show_stored_fragments
 
 import outputs
 
+from collections import defaultdict
+from itertools import chain
+import hashlib
 import os, sys
 
 # Abstractions and relation processing.
 
-from objects import commit_text, \
-                    compare_fragments, \
-                    fix_category_names, \
+from objects import fix_category_names, \
                     get_all_words, \
-                    get_common_terms, get_fragment_terms, \
+                    normalise_fragments, \
                     process_fragments, \
-                    process_term_vectors
+                    process_term_vectors, \
+                    recompute_connections
+
+from similarity import compare_fragments_by_matrix
+
+from vectors import Vocabulary
 
 # Transformations on the words and text.
 
-from analysis import process_fragment_tokens, \
-                     lower_word, stem_word
+from analysis import Analyser, SnowballNormaliser, default_profile, \
+                     lower_word, pool, profiles, stem_word
+
+from grouping import PhraseGrouper, TermGrouper
 
-from grouping import group_words
+from lexicon import LexiconAnalyser, get_lexicon_from_file
 
 from stopwords import POSFilter
 
-from text import normalise_accents, remove_punctuation_from_words
+from utils import CountingDict
 
 
 
 # The input data processing workflow.
 
-def process_input_data(filenames, config, out, lang):
+def process_input_data(sources, config, out, lang):
+
+    """
+    Process data from 'sources', given as (source, filename mapping) tuples by
+    any iterable object, using 'config' to adjust the processing, registering
+    output data with 'out'. The specified 'lang' indicates the language for
+    interpreting the input tokens.
+    """
+
+    sources, fragments = get_fragments_from_sources(sources, config)
+    fragments, all_words = process_input_fragments(fragments, config, lang)
+
+    # Register some output data.
+
+    out["all_words"] = all_words
+    out["fragments"] = fragments
+    out["sources"] = get_source_digests(sources, config)
+
+    return fragments
+
+def process_input_data_incrementally(sources, config, out, lang):
 
     """
-    Process data from 'filenames', using 'config' to adjust the processing,
-    registering output data with 'out'. The specified 'lang' indicates the
-    language for interpreting the input tokens.
+    Process data from 'sources' in the same way as 'process_input_data',
+    reusing the fragments previously registered with 'out' for sources whose
+    input files and processing settings are unchanged.
+
+    Return a tuple of the form (fragments, changed fragments). Where no previous
+    output exists, all fragments are processed and the changed fragments are
+    given as None.
     """
 
-    fragments = get_fragments_from_files(filenames)
+    outfile = out.filename
+
+    for name in ("connections.txt", "fragments.txt", "sources.txt", "words.txt"):
+        if not out.exists(name):
+            return process_input_data(sources, config, out, lang), None
+
+    # Identify and process the sources whose input files or settings have
+    # changed, recording the digests of all sources.
+
+    previous = get_map_from_file(outfile("sources.txt"))
+    digests = []
+
+    changed_sources, changed = get_fragments_from_sources(
+        get_changed_sources(sources, previous, config, digests), config)
+
+    changed, all_words = process_input_fragments(changed, config, lang)
+
+    # Combine the previous fragments for unchanged sources with the new
+    # fragments for the changed sources, retaining the order of the sources.
+
+    source_fragments = defaultdict(list)
+
+    for fragment in get_restored_fragments(outfile("fragments.store"),
+                                           outfile("fragments.txt")):
+        source_fragments[fragment.source.filename].append(fragment)
+
+    changed_names = set(map(lambda s: os.path.split(s[0])[-1], changed_sources))
+
+    for name in changed_names:
+        del source_fragments[name]
+
+    for fragment in changed:
+        source_fragments[fragment.source.filename].append(fragment)
+
+    fragments = []
+
+    for name, digest in digests:
+        fragments += source_fragments[name]
+
+    # Retain previously encountered words. Words only found in removed or
+    # changed sources will also be retained.
+
+    all_words = list(set(all_words).union(get_list_from_file(outfile("words.txt"))))
+    all_words.sort()
+
+    # Register some output data.
+
+    out["all_words"] = all_words
+    out["fragments"] = fragments
+    out["sources"] = digests
+
+    return fragments, changed
+
+def get_fragments_from_sources(sources, config):
+
+    """
+    Obtain fragments for 'sources' given as (source, filename mapping) tuples
+    by any iterable object, using 'config' to control the reading of input
+    files. Return a tuple of the form (sources, fragments) providing a list of
+    the sources as well as the fragments.
+    """
+
+    l = []
+    fragments = []
+
+    for source, source_filenames, source_fragments in \
+        get_fragments_for_sources(sources, config.get("jobs"), config.get("cache")):
+
+        l.append((source, source_filenames))
+        fragments += source_fragments
+
+    return l, fragments
+
+def process_input_fragments(fragments, config, lang):
+
+    """
+    Process the 'fragments' obtained from input files, using 'config' to adjust
+    the processing. The specified 'lang' indicates the language for
+    interpreting the input tokens.
+
+    Return a tuple of the form (processed fragments, raw input words).
+    """
 
     # Discard empty fragments.
 
@@ -94,33 +214,105 @@ def process_input_data(filenames, config, out, lang):
 
     all_words = get_all_words(fragments)
 
-    # Tidy up the data.
-
-    process_fragments(fragments, [normalise_accents])
-    commit_text(fragments)
+    # Tidy up the data, normalising accents, preserving the original text and
+    # then removing punctuation.
 
-    process_fragments(fragments, [remove_punctuation_from_words])
+    normalise_fragments(fragments)
 
     # Perform some processes on the words:
 
     # Part-of-speech tagging.
     # Normalisation involving stemming and lower-casing of words.
 
-    process_fragment_tokens(fragments, [stem_word, lower_word], lang)
+    analyser = config.get("analyser") or Analyser(lang)
+    normaliser = config.get("normaliser")
+
+    # Any separate normaliser stems words after tagging, replacing the
+    # lemmatisation otherwise performed.
+
+    if normaliser:
+        analyser.process_fragments(fragments, [lower_word])
+        normaliser.normalise_fragments(fragments)
+    else:
+        analyser.process_fragments(fragments, [stem_word, lower_word])
 
     # Grouping of words into terms.
     # Filtering of stop words by selecting certain kinds of words (for example,
     # nouns, verbs, adjectives).
 
-    process_fragments(fragments, [group_words,
-                                  config.get("posfilter").filter_words])
+    grouper = config.get("grouper") or \
+              TermGrouper(tags=config.get("posfilter").tags)
 
-    # Register some output data.
+    processes = [grouper.group_words]
 
-    out["all_words"] = all_words
-    out["fragments"] = fragments
+    # Known phrases are grouped before other entities are identified.
 
-    return fragments
+    if config.get("phrases"):
+        processes.insert(0, config.get("phrases").group_words)
+
+    process_fragments(fragments, processes)
+
+    return fragments, all_words
+
+def get_settings_digest(config):
+
+    "Return a digest of the settings in 'config' affecting fragment processing."
+
+    grouper = config.get("grouper")
+    lexicon = config.get("lexicon")
+    phrases = config.get("phrases")
+
+    settings = (config.get("all_fragments"),
+                sorted((config.get("category_map") or {}).items()),
+                config.get("lang"),
+                sorted((config.get("lang_map") or {}).items()),
+                config.get("profile"),
+                lexicon and lexicon.digest(),
+                config.get("normaliser_name"),
+                config.get("pretokenised"),
+                config.get("grouping"),
+                phrases and sorted(phrases.phrases),
+                sorted(config.get("posfilter").tags),
+                grouper and sorted(grouper.filler_words),
+                grouper and sorted(grouper.units))
+
+    return hashlib.sha1(repr(settings).encode("utf-8")).hexdigest()
+
+def get_changed_sources(sources, previous, config, digests):
+
+    """
+    Generate the (source, filename mapping) entries from 'sources' not having
+    digests in the 'previous' mapping from digests to source names, using
+    'config' to obtain the settings affecting fragment processing. A (name,
+    digest) entry is added to 'digests' for each of the 'sources'.
+    """
+
+    settings = get_settings_digest(config)
+
+    for source, source_filenames in sources:
+        name = os.path.split(source)[-1]
+        digest = get_digest(source, source_filenames, settings)
+        digests.append((name, digest))
+
+        if previous.get(digest) != name:
+            yield (source, source_filenames)
+
+def get_source_digests(sources, config):
+
+    """
+    Return a list of (name, digest) tuples for 'sources' given as (source,
+    filename mapping) tuples, with each digest incorporating the settings in
+    'config' affecting fragment processing.
+    """
+
+    settings = get_settings_digest(config)
+    l = []
+
+    for source, source_filenames in sources:
+        l.append((os.path.split(source)[-1],
+                  get_digest(source, source_filenames, settings)))
+
+    return l
 
 def process_fragment_data(fragments, config, out):
 
@@ -133,18 +325,45 @@ def process_fragment_data(fragments, config, out):
     # other statistics-related operations since the objective is merely to
     # establish related fragments for further inspection.
 
-    process_term_vectors(fragments)
-
-    # Get common terms (common between fragments).
-
-    fragment_terms = get_fragment_terms(fragments)
-    common_fragment_terms = get_common_terms(fragment_terms)
+    process_term_vectors(fragments, vocabulary=Vocabulary())
 
     # Determine fragment similarity by taking the processed words and comparing
     # fragments.
 
-    connections = compare_fragments(fragments,
-                                    terms_to_fragments=common_fragment_terms)
+    connections = compare_fragments_by_matrix(fragments,
+                                              block_size=config.get("block_size"))
+
+    # Register some output data.
+
+    out["connections"] = connections
+
+    return connections
+
+def process_fragment_data_incrementally(fragments, changed, config, out):
+
+    """
+    Process 'fragments' to obtain connections in the same way as
+    'process_fragment_data', reusing the connections previously registered with
+    'out' that do not involve the 'changed' fragments.
+    """
+
+    outfile = out.filename
+
+    process_term_vectors(fragments, vocabulary=Vocabulary())
+
+    # Restore the connections between unchanged fragments, recomputing their
+    # similarities.
+
+    changed = set(changed)
+    unchanged = list(filter(lambda f: f not in changed, fragments))
+
+    connections = get_serialised_connections(outfile("connections.txt"), unchanged)
+    connections = recompute_connections(connections)
+
+    # Compare only those pairs involving changed fragments.
+
+    connections += compare_fragments_by_matrix(fragments, changed,
+                                               config.get("block_size"))
 
     # Register some output data.
 
@@ -165,6 +384,7 @@ def emit_basic_output(out):
     # Emit the fragments for inspection and potential recovery.
 
     outputs.show_fragments(out["fragments"], outfile("fragments.txt"))
+    show_stored_fragments(out["fragments"], outfile("fragments.store"))
 
     # Emit the connection details for potential recovery.
 
@@ -174,6 +394,10 @@ def emit_basic_output(out):
 
     outputs.show_all_words(out["all_words"], outfile("words.txt"))
 
+    # Emit digests of the sources for incremental processing.
+
+    outputs.show_source_digests(out["sources"], outfile("sources.txt"))
+
 def emit_verbose_output(out):
 
     "Using 'out', emit output data featuring verbose details."
@@ -186,6 +410,22 @@ def emit_verbose_output(out):
 
 
 
+# Grouping modes and the analysis profiles employed by default for each mode.
+
+groupings = {
+    "names"     : default_profile,
+    "ner"       : "tagger+ner",
+    }
+
+# Normalisers replacing lemmatisation.
+
+normalisers = {
+    "lemma"     : None,
+    "snowball"  : SnowballNormaliser,
+    }
+
+
+
 # Help text for program invocation.
 
 progname = os.path.split(sys.argv[0])[-1]
@@ -194,24 +434,113 @@ helptext = """\
 Usage: %s [ <options> ] <output directory> <input file>...
 
 An output directory name is needed along with a collection of text and tiers
-filenames for reading.
+filenames, or ELAN annotation (.eaf) filenames, for reading. Alternatively,
+the --input-dir and --manifest options can be used to indicate the filenames.
 
 Input file processing options:
 
 --all-fragments         Process all fragments including uncategorised ones
 
+--batch-size <number>   Analyse fragment text in batches of the indicated size
+
+--block-size <number>   Compare fragments in blocks of the indicated number of
+                        fragments, limiting the memory used (default is 1024)
+
+--cache-dir <directory> Retain the fragments read from input files in the
+                        indicated directory (default is the cache directory
+                        within the output directory)
+
+--cache-size <megabytes>
+                        Limit the size of the input cache (default is 1024)
+
 --category-map <filename>
                         Change categories according to the mapping defined in
                         the indicated file
 
+--clear-cache           Remove any previously cached data from the input cache
+
+--filler-words <filename>
+                        Permit the words found on each line of the indicated
+                        file to appear within names (default is "de", "del",
+                        "la", "las", "lo" and "los")
+
+--grouping <mode>       Group words into names using the indicated mode, being
+                        one of "names" (the default), grouping title-cased
+                        words, or "ner", grouping the words in each named
+                        entity recognised by the language model (employing the
+                        "tagger+ner" profile by default and requiring a profile
+                        employing the entity recogniser)
+
+--input-dir <directory> Read the text and tiers files found in the indicated
+                        directory, processing them in the order of their
+                        names
+
+--incremental           Only process input files that have changed since the
+                        output directory was last populated, reusing the
+                        previously produced fragments and connections
+
+--jobs <number>         Read the input files using the indicated number of
+                        processes (default is 1)
+
 --lang <language code>  Indicate the language for interpretation of the input
                         text (default is "es")
 
+--lang-map <filename>   Indicate the language of the input text for each source
+                        using a mapping defined in the indicated file, with the
+                        language given by --lang being used for other sources
+
+--lexicon <filename>    Analyse fragment text using the lexicon defined in the
+                        indicated file instead of a language model, giving
+                        words missing from the lexicon the X tag (such words
+                        are discarded unless --pos-tags preserves this tag)
+
+--manifest <filename>   Read the text and tiers files listed on each line of
+                        the indicated file, processing them in the order listed
+
+--max-models <number>   Retain no more than the indicated number of language
+                        models in memory when analysing text in different
+                        languages
+
+--no-cache              Read all input files without using the input cache
+
+--no-token-cache        Analyse all fragment text without using the token cache
+
+--normaliser <name>     Normalise words using the indicated normaliser, being
+                        one of "lemma" (the default), using the lemmas given by
+                        the language model or lexicon, or "snowball", using a
+                        Snowball stemmer (requiring the PyStemmer package)
+
+--phrases <filename>    Group words forming the phrases found on each line of
+                        the indicated file into single terms
+
+--pretokenised          Analyse the words of each fragment as found in the input
+                        files instead of tokenising the fragment text
+
+--profile <name>        Analyse fragment text using the indicated profile,
+                        being one of "tagger-only" (the default), "tagger+ner"
+                        or "full", disabling language model components not
+                        required by the profile
+
 --pos-tags <filename>   Preserve only words with the part-of-speech tags found
                         in the indicated file
 
+--tagging-jobs <number> Analyse fragment text in batches using the indicated
+                        number of processes (default is 1)
+
+--token-cache <filename>
+                        Retain the tokens produced by analysing fragment text
+                        in the indicated file (default is tokens.db within the
+                        output directory)
+
+--units <filename>      Group numbers with the words found on each line of the
+                        indicated file into quantities (default is "años" and
+                        "días")
+
 Output options:
 
+--timings               Analyse fragment text one fragment at a time, reporting
+                        the time spent in each language model component
+
 --verbose               Produce verbose output describing the data
 
 The output directory will be populated with files containing the following:
@@ -219,8 +548,12 @@ The output directory will be populated with files containing the following:
  * fragments
  * connections
  * all words from fragments
+ * digests of the input files for each source
 
 If --verbose is indicated, a verbose report of the connections will be produced.
+
+If --timings is indicated, a report of the analysis time spent in each language
+model component will be produced.
 """ % progname
 
 
@@ -239,8 +572,38 @@ if __name__ == "__main__":
 
     config["all_fragments"] = get_flag("--all-fragments")
     config["category_map"] = get_map_from_file(get_option("--category-map"))
+    config["jobs"] = get_option("--jobs", 1, 1, int)
     config["lang"] = get_option("--lang", missing="es")
+    config["lang_map"] = get_map_from_file(get_option("--lang-map"))
+    config["grouping"] = get_option("--grouping", missing="names")
+    config["profile"] = get_option("--profile")
+    config["lexicon"] = get_lexicon_from_file(get_option("--lexicon"))
+    config["normaliser_name"] = get_option("--normaliser", missing="lemma")
+    config["pretokenised"] = get_flag("--pretokenised")
     config["posfilter"] = POSFilter(get_list_from_file(get_option("--pos-tags")))
+    config["grouper"] = TermGrouper(
+                            get_list_from_file(get_option("--filler-words")),
+                            get_list_from_file(get_option("--units")),
+                            config["posfilter"].tags,
+                            config["grouping"] != "ner")
+
+    phrases = get_list_from_file(get_option("--phrases"))
+    config["phrases"] = phrases and PhraseGrouper(phrases) or None
+    config["block_size"] = get_option("--block-size", None, None, int)
+
+    batch_size = get_option("--batch-size", None, None, int)
+    cache_dir = get_option("--cache-dir")
+    cache_size = get_option("--cache-size", 1024, 1024, int)
+    clear_cache = get_flag("--clear-cache")
+    incremental = get_flag("--incremental")
+    input_dirs = get_options("--input-dir")
+    manifests = get_options("--manifest")
+    max_models = get_option("--max-models", None, None, int)
+    no_cache = get_flag("--no-cache")
+    no_token_cache = get_flag("--no-token-cache")
+    tagging_jobs = get_option("--tagging-jobs", 1, 1, int)
+    timings = get_flag("--timings")
+    token_cache = get_option("--token-cache")
 
     verbose_output = get_flag("--verbose")
 
@@ -249,7 +612,9 @@ if __name__ == "__main__":
     try:
         outdir = sys.argv[1]
         filenames = sys.argv[2:]
-        need_at_least_one_filename = filenames[0]
+
+        if not input_dirs and not manifests:
+            need_at_least_one_filename = filenames[0]
 
     # Show the help message and exit if the arguments are incorrect.
 
@@ -257,21 +622,99 @@ if __name__ == "__main__":
         print(helptext, file=sys.stderr)
         sys.exit(1)
 
-    # Test for a language.
+    # Test for a language, a known grouping mode, a known profile and a known
+    # normaliser.
+
+    if not config["lang"] or config["grouping"] not in groupings or \
+       config["profile"] and config["profile"] not in profiles or \
+       config["normaliser_name"] not in normalisers:
 
-    if not config["lang"]:
         print(helptext, file=sys.stderr)
         sys.exit(1)
 
+    config["profile"] = config["profile"] or groupings[config["grouping"]]
+
+    # Test for the entity recogniser where named entities are to be grouped.
+
+    if config["grouping"] == "ner":
+        if config["lexicon"]:
+            print("Need a language model, not a lexicon, to group named "
+                  "entities.", file=sys.stderr)
+            sys.exit(1)
+
+        if "ner" in profiles[config["profile"]]:
+            print("Need a profile employing the entity recogniser, such as "
+                  "tagger+ner, to group named entities.", file=sys.stderr)
+            sys.exit(1)
+
+    normaliser = normalisers[config["normaliser_name"]]
+    config["normaliser"] = normaliser and normaliser(config["lang"],
+                                                     config["lang_map"])
+
     # Derive filenames for output files.
 
     out = outputs.Output(outdir)
     outfile = out.filename
 
+    # Prepare any cache for input data.
+
+    if not no_cache or clear_cache:
+        cache = Cache(cache_dir or outfile("cache"), cache_size * 1024 * 1024)
+
+        if clear_cache:
+            cache.clear()
+
+        if not no_cache:
+            config["cache"] = cache
+
+    # Prepare the analysis of fragment text using any lexicon, or using a
+    # language model while retaining analysed tokens in any token cache.
+
+    config["timings"] = None
+
+    if timings:
+        config["timings"] = CountingDict(0.0)
+
+    if no_token_cache:
+        token_cache = None
+    else:
+        token_cache = token_cache or outfile("tokens.db")
+
+    if config["lexicon"]:
+        config["analyser"] = LexiconAnalyser(config["lexicon"],
+                                             config["pretokenised"])
+    else:
+        pool.limit = max_models
+        config["analyser"] = Analyser(config["lang"], batch_size, tagging_jobs,
+                                      config["profile"], config["timings"],
+                                      token_cache, config["lang_map"],
+                                      config["pretokenised"],
+                                      config["grouping"] == "ner")
+
+    # Identify the input files, pairing those found in directories and
+    # manifests as they are obtained.
+
+    if input_dirs or manifests:
+        sources = get_input_groups(chain(filenames,
+            chain.from_iterable(map(get_filenames_from_directory, input_dirs)),
+            chain.from_iterable(map(get_filenames_from_manifest, manifests))))
+    else:
+        sources = get_input_filenames(filenames)
+
     # Process input data.
 
-    fragments = process_input_data(filenames, config, out, config["lang"])
-    connections = process_fragment_data(fragments, config, out)
+    if incremental:
+        fragments, changed = process_input_data_incrementally(sources, config,
+                                                              out, config["lang"])
+    else:
+        fragments = process_input_data(sources, config, out, config["lang"])
+        changed = None
+
+    if changed is not None:
+        connections = process_fragment_data_incrementally(fragments, changed,
+                                                          config, out)
+    else:
+        connections = process_fragment_data(fragments, config, out)
 
     # Emit basic output to serialise the processed data.
 
@@ -280,4 +723,7 @@ if __name__ == "__main__":
     if verbose_output:
         emit_verbose_output(out)
 
+    if config["timings"] is not None:
+        outputs.show_timings(config["timings"], outfile("timings.txt"))
+
 # vim: tabstop=4 expandtab shiftwidth=4
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8
+
+"""
+Caching of processed input data.
+
+Copyright (C) 2018, 2019 University of Oslo
+
+This program is free software; you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation; either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details.
+
+You should have received a copy of the GNU General Public License along with
+this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from os import getpid, listdir, makedirs, remove, rename, stat, utime
+from os.path import basename, isdir, join
+import hashlib
+import json
+import pickle
+import re
+import sqlite3
+
+# The version of the cached data, to be increased when the processing of input
+# files or the representation of the cached objects changes, thus invalidating
+# any previously cached data. The representation of the cached objects changes
+# whenever the attributes of a pickled class change, with the versions being as
+# follows:
+#
+# 1. Sources with start and end times given as floating point seconds
+# 2. Sources with integer millisecond timings, slotted objects, keyed objects
+# 3. All of the above, invalidating data cached by revisions that changed the
+#    representation without increasing the version
+
+cache_version = 3
+
+# The names of files holding cached objects, these being named using digests
+# and being written to temporary files before being stored.
+
+key_pattern = re.compile(r"^[0-9a-f]+$")
+entry_pattern = re.compile(r"^[0-9a-f]+(\.[0-9]+\.tmp)?$")
+
+class Cache:
+
+    """
+    A directory of cached objects, each stored in a file named using a key
+    that is a hexadecimal digest of the data from which the object was
+    produced. Only files named in this way are considered to be part of the
+    cache, and other files in the directory are left alone.
+    """
+
+    def __init__(self, dirname, limit=None):
+
+        """
+        Initialise the cache in 'dirname', limiting the total size of the cached
+        data to 'limit' bytes if specified.
+        """
+
+        self.dirname = dirname
+        self.limit = limit
+
+        if not isdir(self.dirname):
+            makedirs(self.dirname)
+
+    def filename(self, key):
+        return join(self.dirname, key)
+
+    def entries(self):
+
+        "Return the names of files written by the cache."
+
+        return list(filter(entry_pattern.match, listdir(self.dirname)))
+
+    def keys(self):
+        return list(filter(lambda name: not name.endswith(".tmp"),
+                           self.entries()))
+
+    def clear(self):
+
+        "Remove all cached objects and any incompletely written objects."
+
+        for name in self.entries():
+            remove(join(self.dirname, name))
+
+    def get(self, key, default=None):
+
+        """
+        Return the object stored for 'key' or 'default' if no usable object is
+        stored.
+        """
+
+        filename = self.filename(key)
+
+        try:
+            f = open(filename, "rb")
+        except OSError:
+            return default
+
+        try:
+            try:
+                value = pickle.load(f)
+            except Exception:
+                return default
+        finally:
+            f.close()
+
+        # Record the use of the object so that it is retained when trimming.
+
+        utime(filename)
+        return value
+
+    def set(self, key, value):
+
+        "Store 'value' for 'key'."
+
+        if not key_pattern.match(key):
+            raise ValueError(key)
+
+        filename = self.filename(key)
+        tmpfilename = "%s.%d.tmp" % (filename, getpid())
+
+        f = open(tmpfilename, "wb")
+        try:
+            pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+
+        # Replace any existing file only when the object is fully written.
+
+        rename(tmpfilename, filename)
+
+    def trim(self):
+
+        """
+        Remove the least recently used objects until the size of the cache no
+        longer exceeds any limit.
+        """
+
+        if self.limit is None:
+            return
+
+        entries = []
+        total = 0
+
+        for key in self.keys():
+            details = stat(self.filename(key))
+            entries.append((details.st_mtime, details.st_size, key))
+            total += details.st_size
+
+        entries.sort()
+
+        for mtime, size, key in entries:
+            if total <= self.limit:
+                break
+
+            remove(self.filename(key))
+            total -= size
+
+class TokenCache:
+
+    """
+    A database of analysed texts, each mapped to the (text, tag, lemma) details
+    of its tokens as produced by a particular language model.
+    """
+
+    def __init__(self, filename, lang, model, variant=None):
+
+        """
+        Initialise the cache stored in 'filename' for texts in 'lang' analysed
+        by 'model', being a string identifying the model name and version.
+        Entries produced by other versions of the model are discarded.
+
+        Any 'variant' distinguishes entries providing different token details
+        from the same model, these being retained alongside other entries for
+        the model.
+        """
+
+        self.filename = filename
+        self.lang = lang
+        self.model = variant and "%s/%s" % (model, variant) or model
+
+        self.db = sqlite3.connect(filename)
+        self.db.execute("create table if not exists tokens "
+                        "(lang text, model text, text text, tokens text, "
+                        "primary key (lang, model, text))")
+
+        self.db.execute("delete from tokens where lang = ? and model != ? "
+                        "and substr(model, 1, ?) != ?",
+                        (lang, model, len(model) + 1, "%s/" % model))
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def get(self, text, default=None):
+
+        """
+        Return a list of token details for 'text' or 'default' if the text has
+        not been stored. Each token is described by a tuple of the form (text,
+        tag, lemma) or, for some variants, a longer tuple starting with these
+        values.
+        """
+
+        row = self.db.execute("select tokens from tokens "
+                              "where lang = ? and model = ? and text = ?",
+                              (self.lang, self.model, text)).fetchone()
+
+        if row is None:
+            return default
+
+        return list(map(tuple, json.loads(row[0])))
+
+    def set(self, text, tokens):
+
+        "Store for 'text' the 'tokens' given as tuples of token details."
+
+        self.db.execute("insert or replace into tokens values (?, ?, ?, ?)",
+                        (self.lang, self.model, text, json.dumps(tokens)))
+
+    def commit(self):
+
+        "Make all stored entries persistent."
+
+        self.db.commit()
+
+def get_cached_tokens(filename, lang=None):
+
+    """
+    Generate (text, tokens) tuples for the texts stored in the token cache
+    'filename', restricting them to those in any indicated 'lang'. Each tokens
+    value is a list of (text, tag, lemma) tuples, omitting any other details
+    stored for variants.
+    """
+
+    db = sqlite3.connect(filename)
+    try:
+        if lang:
+            rows = db.execute("select text, tokens from tokens where lang = ?",
+                              (lang,))
+        else:
+            rows = db.execute("select text, tokens from tokens")
+
+        for text, tokens in rows:
+            yield text, list(map(lambda t: tuple(t[:3]), json.loads(tokens)))
+    finally:
+        db.close()
+
+def get_digest(source, source_filenames, settings=None):
+
+    """
+    Return a digest for 'source' computed from the contents of the files in the
+    'source_filenames' mapping from data types to filenames. Any 'settings'
+    string is also incorporated into the digest.
+    """
+
+    digest = hashlib.sha1()
+    digest.update(("%d:%s" % (cache_version, basename(source))).encode("utf-8"))
+
+    if settings:
+        digest.update((":%s" % settings).encode("utf-8"))
+
+    for datatype in sorted(source_filenames.keys()):
+        digest.update((":%s:" % datatype).encode("utf-8"))
+
+        f = open(source_filenames[datatype], "rb")
+        try:
+            while True:
+                data = f.read(65536)
+                if not data:
+                    break
+                digest.update(data)
+        finally:
+            f.close()
+
+    return digest.hexdigest()
+
+# vim: tabstop=4 expandtab shiftwidth=4
@@ -33,14 +33,18 @@ from collections import deque #Stack
 import select
 import time
 
-# For displaying the phone metrics
-import matplotlib.pyplot as plt
-
 #Audio playback (need ffmpeg to play audio and install pydub (python3 -m pip install pydub))
 #For installing ffmpeg you can run "brew install ffmpeg" in the terminal
 #For installing pydub you can run "python3 -m pip install pydub"
-from pydub import AudioSegment
-from pydub.playback import play
+#pydub is only imported when audio is first played
+
+def get_audio(playfile):
+    from pydub import AudioSegment
+    return AudioSegment.from_file(playfile, format="wav")
+
+def play_audio(sound):
+    from pydub.playback import play
+    play(sound)
 
 # importing the file mlExplore.py
 import mlExplore as mlE
@@ -344,8 +348,8 @@ class Explorer:
     def playFile(self, fragment, visited, sock):
         if visited:
             playfile = audiopath + "ExcerptBrunaSoplo.wav"
-            sound = AudioSegment.from_file(playfile, format="wav")
-            play(sound)   
+            sound = get_audio(playfile)
+            play_audio(sound)   
             self.show_fragment(fragment)
 
 
@@ -357,11 +361,11 @@ class Explorer:
         end = float(duration[1])
 
         playfile = audiopath + filename + ".wav"
-        sound = AudioSegment.from_file(playfile, format="wav")
+        sound = get_audio(playfile)
 
         #Times 1000 to go from seconds to milliseconds
         splice = sound[start*1000:end*1000]
-        play(splice)
+        play_audio(splice)
 
         #Empty the socket so we do not compare data we got before playback of audiofile and data recieved after
         empty_socket(sock)       
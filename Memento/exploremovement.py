@@ -37,10 +37,21 @@ import select
 import socket
 import sys
 
-# Audio playback.
+# Audio playback, with pydub only being imported when audio is first played.
 
-from pydub import AudioSegment
-from pydub.playback import play
+def get_audio(playfile):
+
+    "Return the audio in 'playfile'."
+
+    from pydub import AudioSegment
+    return AudioSegment.from_file(playfile, format="wav")
+
+def play_audio(sound):
+
+    "Play 'sound'."
+
+    from pydub.playback import play
+    play(sound)
 
 class AudioExplorer(Explorer):
 
@@ -64,20 +75,20 @@ class AudioExplorer(Explorer):
         end = float(duration[1])
 
         playfile = join(self.audiopath, filename + ".wav")
-        sound = AudioSegment.from_file(playfile, format="wav")
+        sound = get_audio(playfile)
 
         # Convert from seconds to milliseconds.
 
         splice = sound[start*1000:end*1000]
-        play(splice)
+        play_audio(splice)
 
     def play_visited(self):
 
         "Play audio to indicate a visited fragment."
 
         playfile = join(self.audiopath, "ExcerptBrunaSoplo.wav")
-        sound = AudioSegment.from_file(playfile, format="wav")
-        play(sound)
+        sound = get_audio(playfile)
+        play_audio(sound)
 
     def show_fragment(self, identifier=None, view=False):
 
@@ -33,6 +33,8 @@ from inputs import get_flag, get_option, get_options
 
 from serialised import get_serialised_connections, get_serialised_fragments
 
+from store import get_restored_store
+
 from wordlist import get_wordlist_from_file
 
 import graph
@@ -59,17 +61,28 @@ from related import get_accessing_fragments, \
 
 from stats import emit_statistics_output, process_statistics
 
+from vectors import Vocabulary
+
 
 
 # Restoration of serialised data.
 
 def restore_fragments(out):
 
-    "Restore fragments from an output file via 'out'."
+    """
+    Restore fragments from an output file via 'out', also registering any
+    fragment store from which the fragments were restored.
+    """
 
-    out["fragments"] = fragments = \
-        get_serialised_fragments(outfile("fragments.txt"))
+    store = get_restored_store(outfile("fragments.store"), outfile("fragments.txt"))
 
+    if store is not None:
+        out["fragment_store"] = store
+        fragments = store.get_fragments()
+    else:
+        fragments = get_serialised_fragments(outfile("fragments.txt"))
+
+    out["fragments"] = fragments
     return fragments
 
 def restore_connections(fragments, config, out):
@@ -82,7 +95,7 @@ def restore_connections(fragments, config, out):
     # Define the term vectors.
 
     process_term_vectors(fragments, not config.get("term_presence_only"),
-                         out["inv_doc_frequencies"])
+                         out["inv_doc_frequencies"], Vocabulary())
 
     # Restore the connections using the fragments.
 
@@ -116,6 +129,11 @@ def process_wordlist(fragments, config, out):
 
         out["fragments_filtered"] = fragments
 
+        # Any fragment store no longer describes the fragments.
+
+        if "fragment_store" in out:
+            del out["fragment_store"]
+
 # Relation processing.
 
 def process_relations(connections, config, out):
@@ -355,7 +373,7 @@ if __name__ == "__main__":
 
     fragments = restore_fragments(out)
     process_wordlist(fragments, config, out)
-    process_statistics(fragments, out)
+    process_statistics(fragments, out, out.get("fragment_store"))
     connections = restore_connections(fragments, config, out)
 
     # Process relation data.
@@ -21,11 +21,198 @@ this program.  If not, see <http://www.gnu.org/licenses/>.
 
 ----
 
-An alternative approach to this may involve using named entity recognition in
-toolkits such as spaCy.
+An alternative approach to this involves using named entity recognition in
+toolkits such as spaCy, with the analysis module combining the tokens in each
+recognised entity into a single term.
 """
 
-from objects import Term
+from objects import Term, get_term
+from text import PhraseIndex
+
+class PhraseGrouper:
+
+    "A way of grouping known phrases into entities."
+
+    def __init__(self, phrases):
+
+        """
+        Initialise the grouper with 'phrases', each being a string containing
+        space-separated words.
+        """
+
+        self.phrases = phrases
+        self.index = PhraseIndex()
+
+        for phrase in phrases:
+            self.index.add(phrase.split())
+
+    def group_words(self, terms):
+
+        """
+        Group 'terms' into entities where they form known phrases, with phrases
+        formed from terms being combined into proper nouns. Such entities are
+        retained by any subsequent grouping of names.
+        """
+
+        l = []
+        last = 0
+
+        for start, end, phrase in self.index.find_longest(terms, str):
+            l += terms[last:start]
+            entity = terms[start:end]
+
+            if all(map(lambda t: isinstance(t, Term), entity)):
+                l.append(get_entity_term(entity))
+            else:
+                emit_entity(l, entity)
+
+            last = end
+
+        l += terms[last:]
+        return l
+
+# Words appearing within names.
+
+default_filler_words = ["de", "del", "la", "las", "lo", "los"]
+
+# Words following numbers in quantities.
+
+default_units = ["años", "días"]
+
+class TermGrouper:
+
+    """
+    A way of grouping terms into entities for names and quantities, filtering
+    the resulting terms by part-of-speech tag, in a single pass over the terms.
+    The results are the same as those obtained by applying group_names,
+    group_quantities and a POSFilter in turn.
+
+    Terms already combining several words, such as known phrases, end any name
+    and are not combined with other terms.
+    """
+
+    def __init__(self, filler_words=None, units=None, tags=None, names=True):
+
+        """
+        Initialise the grouper with any given 'filler_words' appearing within
+        names, any 'units' following numbers in quantities, and any 'tags' of
+        terms to be preserved. Without 'tags', terms are not filtered.
+
+        If 'names' is set to a false value, names are not grouped, this being
+        appropriate where named entities have already been identified.
+        """
+
+        self.filler_words = set(filler_words or default_filler_words)
+        self.units = set(units or default_units)
+        self.tags = tags
+        self.names = names
+
+    def group_words(self, terms):
+
+        "Group 'terms' into entities, filtering the results."
+
+        filler_words = self.filler_words
+        units = self.units
+        tags = self.tags
+        names = self.names
+
+        l = []
+
+        # Terms held by the name and quantity stages.
+
+        entity = []
+        filler = []
+        quantity = []
+
+        # Each stage passes its results to the next stage, with the filtering
+        # stage being the last.
+
+        def emit(term):
+            if tags is None or not isinstance(term, Term) or term.tag in tags:
+                l.append(term)
+
+        def emit_quantity(term, word):
+            if word.isdigit():
+                if quantity:
+                    emit(get_entity(quantity))
+                quantity[:] = [term]
+
+            elif word in units:
+                quantity.append(term)
+                emit(get_entity(quantity))
+                del quantity[:]
+
+            else:
+                if quantity:
+                    emit(get_entity(quantity))
+                    del quantity[:]
+
+                emit(term)
+
+        def end_name():
+            if entity:
+                term = get_entity(entity)
+                emit_quantity(term, str(term))
+                del entity[:]
+
+            for term in filler:
+                emit_quantity(term, str(term))
+            del filler[:]
+
+        for term in terms:
+            is_term = isinstance(term, Term)
+
+            if is_term:
+                tag = term.tag
+                word = term.word
+            else:
+                tag = None
+                word = str(term)
+
+            # Retain terms already grouped into entities.
+
+            if is_grouped(word):
+                end_name()
+                emit_quantity(term, word)
+
+            elif names and word.istitle():
+                if word.lower() in filler_words:
+                    if not entity:
+                        emit_quantity(term, word)
+                    else:
+                        filler.append(term)
+
+                elif tag in ("ADP", "DET"):
+                    end_name()
+                    emit_quantity(term, word)
+
+                else:
+                    if filler:
+                        entity += filler
+                        del filler[:]
+                    entity.append(term)
+
+            elif entity and word in filler_words:
+                filler.append(term)
+
+            # Handle other words, filtering them directly where they do not
+            # affect any quantity.
+
+            else:
+                if entity or filler:
+                    end_name()
+
+                if quantity or word in units or word.isdigit():
+                    emit_quantity(term, word)
+                elif tags is None or not is_term or tag in tags:
+                    l.append(term)
+
+        end_name()
+
+        if quantity:
+            emit(get_entity(quantity))
+
+        return l
 
 def group_words(terms):
 
@@ -35,15 +222,13 @@ def group_words(terms):
     terms = group_quantities(terms)
     return terms
 
-def group_names(terms):
+def group_names(terms, filler_words=default_filler_words):
 
     "Group 'terms' into entities for names."
 
     # Word features might be used to support this correctly. However, merely
     # accumulating words of certain kinds can cause false positives.
 
-    filler_words = ["de", "del", "la", "las", "lo", "los"]
-
     l = []
     entity = []
     filler = []
@@ -52,9 +237,15 @@ def group_names(terms):
         tag = isinstance(term, Term) and term.tag or None
         word = str(term)
 
+        # Retain terms already grouped into entities.
+
+        if is_grouped(word):
+            end_entity(l, entity, filler)
+            l.append(term)
+
         # Add title-cased words, incorporating any filler words.
 
-        if word.istitle():
+        elif word.istitle():
 
             # Sometimes articles appear at the start of sentences. Sometimes
             # they are part of entities.
@@ -97,11 +288,10 @@ def group_names(terms):
     end_entity(l, entity, filler)
     return l
 
-def group_quantities(terms):
+def group_quantities(terms, units=default_units):
 
     "Group 'terms' into entities for quantities."
 
-    units = ["años", "días"]
     l = []
     entity = []
 
@@ -130,14 +320,39 @@ def group_quantities(terms):
 
     return l
 
+def is_grouped(word):
+
+    "Return whether 'word' combines several words into an entity."
+
+    return " " in word
+
 def emit_entity(l, entity):
 
     "Add to 'l' the given 'entity'."
 
+    l.append(get_entity(entity))
+
+def get_entity_term(entity):
+
+    """
+    Return a single term for the terms in 'entity' forming a named entity, with
+    multiple terms being combined into a proper noun.
+    """
+
+    if len(entity) == 1:
+        return entity[0]
+
+    return get_term(" ".join(map(lambda t: t.word, entity)), "PROPN",
+                    " ".join(map(lambda t: t.normalised or t.word, entity)))
+
+def get_entity(entity):
+
+    "Return a single term for the given 'entity'."
+
     if len(entity) > 1:
-        l.append(" ".join(map(str, entity)))
+        return " ".join(map(str, entity))
     else:
-        l.append(entity[0])
+        return entity[0]
 
 def end_entity(l, entity, filler):
 
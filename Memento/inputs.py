@@ -20,10 +20,16 @@ You should have received a copy of the GNU General Public License along with
 this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from objects import Category, Fragment, Source
+from cache import get_digest
+from objects import Category, Fragment, Source, get_milliseconds
+from utils import IntervalIndex
 
 from collections import defaultdict
+from multiprocessing import Pool
+from os import scandir
+from os.path import splitext
 from xml.dom.minidom import parse
+from xml.etree.ElementTree import iterparse
 import codecs
 import re
 import sys
@@ -36,30 +42,314 @@ def textContent(n):
         l.append(t.nodeValue)
     return "".join(l)
 
+# Streaming XML processing.
+
+def get_spans_from_file(filename):
+
+    """
+    Generate tuples of the form (tier, start, end, text) for each span found in
+    'filename', this being a filename or file object. The tier is given by the
+    columns attribute of the tier element containing each span.
+
+    Elements are discarded as soon as they have been read, and so the document
+    is never held in memory in its entirety.
+    """
+
+    tier = None
+    elements = []
+
+    for event, element in iterparse(filename, events=("start", "end")):
+
+        # Record the nesting of elements and obtain tier details.
+
+        if event == "start":
+            elements.append(element)
+
+            if element.tag == "TIER":
+                tier = element.get("columns", "")
+            continue
+
+        elements.pop()
+
+        # Emit the span details, taking the textual content from the first
+        # subnode providing it.
+
+        if element.tag == "span":
+            for value in element.iter("v"):
+                yield (tier, element.get("start"), element.get("end"),
+                       value.text or "")
+                break
+
+        # Detach completed spans and tiers from their parents.
+
+        if element.tag in ("span", "TIER"):
+            element.clear()
+            if elements:
+                elements[-1].remove(element)
+
+def get_fragments_from_eaf_file(filename, source):
+
+    """
+    Return populated fragments for 'source' from the ELAN annotation file
+    'filename', this being a filename or file object. The file is read in a
+    single pass, with annotations in the tiers named in 'eaf_text_tiers'
+    providing words and annotations in other tiers providing categorised
+    fragments.
+
+    Time slots without time values, as found in tiers subdividing or included
+    in the annotations of other tiers, are given times estimated from the
+    neighbouring aligned time slots.
+    """
+
+    slots = {}
+    order = []
+    bounds = {}
+    timings = {}
+    annotations = []
+    fragments = []
+    words = []
+    tier = None
+    elements = []
+
+    def add_annotation(annotation_id, start, end, value):
+        timings[annotation_id] = (start, end)
+
+        # Split words sharing an annotation.
+
+        if tier in eaf_text_tiers:
+            for word in value.split():
+                words.append((start, end, word))
+
+        elif value:
+            fragments.append(
+                Fragment(Source(source, start, end, milliseconds=True),
+                         Category(normalise(tier), normalise(value))))
+
+    for event, element in iterparse(filename, events=("start", "end")):
+
+        # Record the nesting of elements and obtain tier details.
+
+        if event == "start":
+            elements.append(element)
+
+            if element.tag == "TIER":
+                tier = element.get("TIER_ID", "")
+            continue
+
+        elements.pop()
+        tag = element.tag
+
+        # Record time slot values, with unaligned slots having no value.
+
+        if tag == "TIME_SLOT":
+            value = element.get("TIME_VALUE")
+            slot = element.get("TIME_SLOT_ID")
+            order.append(slot)
+
+            if value is not None:
+                slots[slot] = int(value)
+            else:
+                slots[slot] = None
+
+        # Obtain the aligned times around each slot in the time order.
+
+        elif tag == "TIME_ORDER":
+            bounds = get_slot_bounds(order, slots)
+
+        # Retain aligned annotations until the times of all slots in the tier
+        # can be obtained.
+
+        elif tag == "ALIGNABLE_ANNOTATION":
+            annotations.append((element.get("ANNOTATION_ID"),
+                                element.get("TIME_SLOT_REF1"),
+                                element.get("TIME_SLOT_REF2"),
+                                element.findtext("ANNOTATION_VALUE") or ""))
+
+        # Obtain annotation timings from referenced annotations.
+
+        elif tag == "REF_ANNOTATION":
+            timing = timings.get(element.get("ANNOTATION_REF"))
+
+            if timing:
+                add_annotation(element.get("ANNOTATION_ID"), timing[0],
+                               timing[1],
+                               element.findtext("ANNOTATION_VALUE") or "")
+
+        # Obtain timings for aligned annotations when each tier is complete.
+
+        elif tag == "TIER":
+            for details in get_aligned_annotations(annotations, slots, bounds):
+                add_annotation(*details)
+
+            annotations = []
+
+        # Detach completed elements from their parents.
+
+        if tag in ("TIME_SLOT", "ANNOTATION", "TIER"):
+            element.clear()
+            if elements:
+                elements[-1].remove(element)
+
+    fragments.sort()
+    fragments = fill_categorised_fragments(fragments)
+
+    words.sort(key=lambda w: w[0])
+    populate_fragments_from_words(fragments, words, milliseconds=True)
+
+    return fragments
+
+def get_slot_bounds(order, slots):
+
+    """
+    Return a dictionary mapping each unaligned slot in 'order', being a list of
+    slot identifiers in time order, to a tuple of the form (previous, next)
+    giving the times of the nearest aligned slots, with 'slots' mapping slot
+    identifiers to times. Missing times are given as None.
+    """
+
+    bounds = {}
+    previous = None
+
+    for slot in order:
+        if slots[slot] is None:
+            bounds[slot] = [previous, None]
+        else:
+            previous = slots[slot]
+
+    following = None
+
+    for slot in reversed(order):
+        if slots[slot] is None:
+            bounds[slot][1] = following
+        else:
+            following = slots[slot]
+
+    return bounds
+
+def get_limit(fn, first, second):
+
+    "Return the result of 'fn' applied to 'first' and 'second' if not None."
+
+    if first is None:
+        return second
+    elif second is None:
+        return first
+    else:
+        return fn(first, second)
+
+def get_aligned_annotations(annotations, slots, bounds):
+
+    """
+    Return a list of tuples of the form (annotation identifier, start, end,
+    value) for 'annotations' in a tier, each given as a tuple of the form
+    (annotation identifier, start slot, end slot, value).
+
+    The times of slots are obtained from 'slots'. Where slots are unaligned,
+    times are distributed evenly between the closest of the neighbouring
+    aligned slots in the tier and the neighbouring aligned slots indicated by
+    'bounds' for the time order, thus also handling unaligned slots that are
+    not bounded by aligned slots in the tier.
+    """
+
+    # Obtain the sequence of slots employed by the tier.
+
+    sequence = []
+
+    for annotation_id, start, end, value in annotations:
+        for slot in (start, end):
+            if not sequence or sequence[-1] != slot:
+                sequence.append(slot)
+
+    times = {}
+    unaligned = []
+    previous = None
+
+    for slot in sequence + [None]:
+        time = slots.get(slot)
+
+        # Queue unaligned slots until the next aligned slot.
+
+        if slot is not None and time is None:
+            if slot in bounds:
+                unaligned.append(slot)
+            continue
+
+        # Distribute the times of queued slots between the closest of the
+        # aligned slots in the tier and in the time order.
+
+        if unaligned:
+            first = get_limit(max, previous, bounds[unaligned[0]][0])
+            last = get_limit(min, time, bounds[unaligned[-1]][1])
+
+            if first is None:
+                first = last
+            elif last is None or last < first:
+                last = first
+
+            if first is not None:
+                for i, unaligned_slot in enumerate(unaligned):
+                    times[unaligned_slot] = first + \
+                        (last - first) * (i + 1) // (len(unaligned) + 1)
+
+            unaligned = []
+
+        if slot is not None:
+            times[slot] = time
+            previous = time
+
+    # Produce annotations whose slots have times.
+
+    l = []
+
+    for annotation_id, start, end, value in annotations:
+        start = times.get(start)
+        end = times.get(end)
+
+        if start is not None and end is not None:
+            l.append((annotation_id, start, end, value))
+
+    return l
+
+def get_categorised_fragments_from_file(filename, source):
+
+    "Using 'filename', return a sorted list of fragments from 'source'."
+
+    return get_categorised_fragments_from_spans(get_spans_from_file(filename),
+                                                source)
+
+def populate_fragments_from_file(fragments, filename, source):
+
+    "Populate the 'fragments' using information from 'filename' for 'source'."
+
+    words = get_words_from_spans(get_spans_from_file(filename))
+    populate_fragments_from_words(fragments, words)
+
 # XML document processing.
 
 def fill_categorised_fragments(fragments):
 
     """
     Add fragments with null categories to the sorted 'fragments' where gaps in
-    the timing exist between adjacent fragments.
+    the timing exist between adjacent fragments. Where fragments overlap, only
+    periods not covered by any fragment are considered to be gaps.
     """
 
     l = []
     last = 0
 
     for fragment in fragments:
-        start = fragment.source.start
+        start = fragment.source.start_ms
 
         # Where the current fragment starts after the end of the last one,
         # introduce a null-category fragment.
 
-        if fragment.source.start > last:
-            l.append(Fragment(Source(fragment.source.filename, last, start),
+        if start > last:
+            l.append(Fragment(Source(fragment.source.filename, last, start,
+                                     milliseconds=True),
                               None))
 
         l.append(fragment)
-        last = fragment.source.end
+        last = max(last, fragment.source.end_ms)
 
     return l
 
@@ -67,35 +357,74 @@ def get_categorised_fragments(tiersdoc, source):
 
     "Using the 'tiersdoc' return a sorted list of fragments from 'source'."
 
+    return get_categorised_fragments_from_spans(get_spans(tiersdoc), source)
+
+def get_categorised_fragments_from_spans(spans, source):
+
+    """
+    Using the 'spans', providing (tier, start, end, text) tuples, return a
+    sorted list of fragments from 'source'.
+    """
+
     fragments = []
 
-    # For each tier, get spans defining categorised fragments.
+    # For each span, obtain the start and end timings plus the category.
 
-    for tier in tiersdoc.getElementsByTagName("TIER"):
-        parent = tier.getAttribute("columns")
+    for parent, start, end, category in spans:
 
-        # For each span, obtain the start and end timings plus the category.
+        # Normalise the category labels.
 
-        for span in tier.getElementsByTagName("span"):
-            start = float(span.getAttribute("start"))
-            end = float(span.getAttribute("end"))
+        parent = normalise(parent)
+        category = normalise(category)
+
+        fragments.append(
+            Fragment(Source(source, start, end),
+                     Category(parent, category)))
+
+    fragments.sort()
+    return fragments
+
+def get_spans(doc):
 
-            # The category is textual content within a subnode.
+    """
+    Generate tuples of the form (tier, start, end, text) for each span found in
+    the tiers of 'doc'.
+    """
 
-            for category in span.getElementsByTagName("v"):
+    for tier in doc.getElementsByTagName("TIER"):
+        parent = tier.getAttribute("columns")
 
-                # Normalise the category labels.
+        for span in tier.getElementsByTagName("span"):
 
-                parent = normalise(parent)
-                category = normalise(textContent(category))
+            # The text is textual content within a subnode.
 
-                fragments.append(
-                    Fragment(Source(source, start, end),
-                             Category(parent, category)))
+            for value in span.getElementsByTagName("v"):
+                yield (parent, span.getAttribute("start"),
+                       span.getAttribute("end"), textContent(value))
                 break
 
-    fragments.sort()
-    return fragments
+def get_words(doc):
+
+    "Generate tuples of the form (start, end, word) for spans in 'doc'."
+
+    for span in doc.getElementsByTagName("span"):
+
+        # The word is textual content within a subnode.
+
+        for word in span.getElementsByTagName("v"):
+            yield (span.getAttribute("start"), span.getAttribute("end"),
+                   textContent(word))
+            break
+
+def get_words_from_spans(spans):
+
+    """
+    Generate tuples of the form (start, end, word) for 'spans' providing
+    (tier, start, end, text) tuples.
+    """
+
+    for tier, start, end, text in spans:
+        yield (start, end, text)
 
 def normalise(s):
 
@@ -117,43 +446,41 @@ def populate_fragments(fragments, textdoc, source):
 
     "Populate the 'fragments' using information from 'textdoc' for 'source'."
 
-    if not fragments:
-        return
+    populate_fragments_from_words(fragments, get_words(textdoc))
 
-    it = iter(fragments)
-    current = None
+def populate_fragments_from_words(fragments, words, milliseconds=False):
 
-    # Obtain each word in turn. These must be sorted.
+    """
+    Populate the 'fragments' using 'words' providing (start, end, word)
+    tuples. Each word is added to every fragment whose period it overlaps.
 
-    for span in textdoc.getElementsByTagName("span"):
-        start = float(span.getAttribute("start"))
-        end = float(span.getAttribute("end"))
+    The word timings are given in seconds, either as numbers or as strings,
+    unless 'milliseconds' is set to a true value, in which case they are given
+    as integer numbers of milliseconds.
+    """
 
-        # The word is textual content within a subnode.
+    if not fragments:
+        return
 
-        for word in span.getElementsByTagName("v"):
-            text = textContent(word)
-            break
-        else:
-            continue
+    index = IntervalIndex([(f.source.start_ms, f.source.end_ms, f) for f in fragments])
+
+    # Obtain each word in turn.
+
+    for start, end, text in words:
 
         # Skip empty words.
 
         if not text:
             continue
 
-        # Find the appropriate fragment, stopping if no more fragments remain.
-
-        while current is None or start >= current.source.end:
-            try:
-                current = it.__next__()
-            except StopIteration:
-                return
+        if not milliseconds:
+            start = get_milliseconds(start)
+            end = get_milliseconds(end)
 
-        # Make sure each word is meant for the current fragment.
+        # Add the word to each of the overlapping fragments.
 
-        if end > current.source.start and start < current.source.end:
-            current.words.append(text)
+        for fragment in index.overlapping(start, end):
+            fragment.words.append(text)
 
 # Input file handling.
 
@@ -161,6 +488,14 @@ def populate_fragments(fragments, textdoc, source):
 
 datatypes = ["Text", "Tiers"]
 
+# Define the combinations of data types providing complete data for a source.
+
+complete_datatypes = [{"EAF"}, set(datatypes)]
+
+# Define the ELAN tiers providing words instead of categories.
+
+eaf_text_tiers = ["Speech", "Text", "Words"]
+
 def get_input_details(filename):
 
     """
@@ -168,6 +503,13 @@ def get_input_details(filename):
     filename does not identify one of the recognised data types, return None.
     """
 
+    # ELAN annotation files provide all data types.
+
+    root, ext = splitext(filename)
+
+    if ext.lower() == ".eaf":
+        return ("EAF", root.rsplit("_", 1)[0])
+
     for datatype in datatypes:
         if datatype in filename:
             return (datatype, filename.rsplit("_", 1)[0])
@@ -201,19 +543,111 @@ def get_input_filenames(args):
     l = []
 
     for prefix, filenames in d.items():
+        group = dict(filenames)
+
+        # Prefer any ELAN annotation file to other files for the same prefix.
+
+        if "EAF" in group and len(group) > 1:
+            filenames = [("EAF", group["EAF"])]
+            group = dict(filenames)
+            report_conflict(prefix, group)
 
         # All the required data types must be supported by the files.
 
-        if len(filenames) == len(datatypes):
-            l.append((prefix, dict(filenames)))
+        if len(filenames) == len(group) and set(group) in complete_datatypes:
+            l.append((prefix, group))
 
     return l
 
-def get_fragments_from_files(filenames):
+def get_input_groups(filenames):
+
+    """
+    Process the 'filenames', which may be provided by any iterable object,
+    generating (prefix, filename mapping) entries for groups of filenames to be
+    processed together. Each entry is generated as soon as filenames for all
+    the required data types have been obtained for a prefix.
+
+    Any ELAN annotation file is preferred to other files for the same prefix
+    unless a complete group of other files has already been generated, with
+    files for prefixes already generated being ignored.
+    """
+
+    d = defaultdict(dict)
+    generated = {}
+
+    for filename in filenames:
+        details = get_input_details(filename)
+
+        # The filename must show signs of providing a recognised data type.
+
+        if not details:
+            continue
+
+        datatype, prefix = details
+
+        if prefix in generated:
+            if filename not in generated[prefix].values():
+                report_conflict(prefix, generated[prefix])
+            continue
+
+        group = d[prefix]
+
+        if datatype == "EAF" and group:
+            group.clear()
+            report_conflict(prefix, {"EAF" : filename})
+
+        group[datatype] = filename
+
+        # All the required data types must be supported by the files.
+
+        if set(group) in complete_datatypes:
+            del d[prefix]
+            generated[prefix] = group
+            yield (prefix, group)
+
+def report_conflict(prefix, group):
+
+    """
+    Report the use of the files in 'group' instead of other files providing the
+    same data for 'prefix'.
+    """
+
+    print("Using %s for %s, ignoring other files." % (
+          ", ".join(sorted(group.values())), prefix), file=sys.stderr)
+
+def get_filenames_from_directory(dirname):
+
+    """
+    Generate the filenames of files in 'dirname' from a single scan, ordered by
+    name so that the order does not depend on the filesystem.
+    """
+
+    entries = list(filter(lambda entry: entry.is_file(), scandir(dirname)))
+    entries.sort(key=lambda entry: entry.name)
+
+    for entry in entries:
+        yield entry.path
+
+def get_filenames_from_manifest(filename):
+
+    "Generate the filenames listed on each line of the manifest 'filename'."
+
+    f = codecs.open(filename, encoding="utf-8")
+    try:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+    finally:
+        f.close()
+
+def get_fragments_from_files(filenames, jobs=None, cache=None):
 
     """
     Given the 'filenames' of files containing tier/fragment and textual data,
-    return populated fragments.
+    return populated fragments. If 'jobs' is greater than one, the files for
+    each source are processed in a pool of that many processes. If 'cache' is
+    specified, fragments are obtained from the cache for unchanged files.
     """
 
     # For each fragment defined by the tiers, collect corresponding words, producing
@@ -221,18 +655,99 @@ def get_fragments_from_files(filenames):
 
     fragments = []
 
-    for source, source_filenames in get_input_filenames(filenames):
-        textfn = source_filenames["Text"]
-        tiersfn = source_filenames["Tiers"]
+    for source, source_filenames, source_fragments in \
+        get_fragments_for_sources(get_input_filenames(filenames), jobs, cache):
+
+        fragments += source_fragments
+
+    return fragments
+
+def get_fragments_for_sources(sources, jobs=None, cache=None):
 
-        textdoc = parse(textfn)
-        tiersdoc = parse(tiersfn)
+    """
+    Generate for each of the 'sources', given as (source, filename mapping)
+    tuples, a tuple of the form (source, filename mapping, fragments), retaining
+    the order of the sources. The 'sources' may be provided by any iterable
+    object and are only consumed as they are needed.
+
+    If 'jobs' is greater than one, a pool of that many processes is used. If
+    'cache' is specified, previously processed fragments are obtained from the
+    cache where the files for a source are unchanged, with newly processed
+    fragments being stored in the cache.
+    """
+
+    sources = map(lambda s: (s[0], s[1], cache), sources)
+
+    if not jobs or jobs < 2:
+        for result in map(get_source_fragments, sources):
+            yield result
+    else:
+        pool = Pool(jobs)
+        try:
+            for result in pool.imap(get_source_fragments, sources):
+                yield result
+        finally:
+            pool.close()
+            pool.join()
+
+    if cache:
+        cache.trim()
+
+def get_source_fragments(details):
+
+    """
+    Using 'details' of the form (source, filename mapping, cache), return a
+    tuple of the form (source, filename mapping, fragments), obtaining the
+    fragments from any cache if possible.
+    """
+
+    source, source_filenames, cache = details
+
+    if not cache:
+        return source, source_filenames, \
+               get_fragments_from_source(source, source_filenames)
+
+    digest = get_digest(source, source_filenames)
+    fragments = cache.get(digest)
+
+    if fragments is None:
+        fragments = get_fragments_from_source(source, source_filenames)
+        cache.set(digest, fragments)
+
+    return source, source_filenames, fragments
+
+def get_fragments_from_source(source, source_filenames):
+
+    """
+    Return populated fragments for 'source' using the 'source_filenames'
+    mapping from data types to filenames. The files are read incrementally.
+    """
+
+    if "EAF" in source_filenames:
+        return get_fragments_from_eaf_file(source_filenames["EAF"], source)
+
+    textfn = source_filenames["Text"]
+    tiersfn = source_filenames["Tiers"]
+
+    fragments = get_categorised_fragments_from_file(tiersfn, source)
+    fragments = fill_categorised_fragments(fragments)
+    populate_fragments_from_file(fragments, textfn, source)
+
+    return fragments
+
+def get_fragments_from_source_documents(source, source_filenames):
+
+    """
+    Return populated fragments for 'source' using the 'source_filenames'
+    mapping from data types to filenames. Each file is parsed as a document.
+    """
 
-        current_fragments = get_categorised_fragments(tiersdoc, source)
-        current_fragments = fill_categorised_fragments(current_fragments)
-        populate_fragments(current_fragments, textdoc, source)
+    textdoc = parse(source_filenames["Text"])
+    tiersdoc = parse(source_filenames["Tiers"])
 
-        fragments += current_fragments
+    fragments = get_categorised_fragments(tiersdoc, source)
+    fragments = fill_categorised_fragments(fragments)
+    populate_fragments(fragments, textdoc, source)
 
     return fragments
 
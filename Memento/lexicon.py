@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8
+
+"""
+Lexicon-based text analysis.
+
+Copyright (C) 2018, 2019 University of Oslo
+
+This program is free software; you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation; either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details.
+
+You should have received a copy of the GNU General Public License along with
+this program.  If not, see <http://www.gnu.org/licenses/>.
+
+----
+
+A lexicon maps words to part-of-speech tags and lemmas without considering the
+context in which words appear. It is compiled from the tokens retained by a
+token cache or the terms in a fragments file produced by a previous run, or
+from lexicon or word list files, and permits the analysis of text without
+employing a language model.
+"""
+
+from analysis import CachedToken, complete_result, init_result, process_doc
+from cache import get_cached_tokens
+from inputs import get_flag, get_option
+from serialised import get_serialised_fragments
+from utils import CountingDict
+
+from os.path import basename
+import codecs
+import hashlib
+import re
+import sys
+
+# The tag given to words not found in a lexicon.
+
+unknown_tag = "X"
+
+# A tokeniser separating words from punctuation.
+
+token_pattern = re.compile(r"\w+|[^\w\s]")
+
+def get_token_texts(s):
+
+    "Return the token texts found in 's'."
+
+    return token_pattern.findall(s)
+
+class Lexicon:
+
+    "A mapping from words to (tag, lemma) tuples."
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return "Lexicon(%r)" % self.entries
+
+    def digest(self):
+
+        "Return a digest of the lexicon entries."
+
+        digest = hashlib.sha1()
+        for word, (tag, lemma) in sorted(self.entries.items()):
+            digest.update(("%s %s %s\n" % (word, tag, lemma)).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, word):
+
+        """
+        Return the (tag, lemma) details for 'word', trying a lower case form of
+        any unknown word, or None if the word is not known.
+        """
+
+        details = self.entries.get(word)
+
+        if details is None:
+            details = self.entries.get(word.lower())
+
+        return details
+
+    def get_token(self, word):
+
+        "Return a token for 'word'."
+
+        details = self.get(word)
+
+        if details is None:
+            return CachedToken(word, unknown_tag, word)
+        else:
+            return CachedToken(word, *details)
+
+    def get_tokens(self, s):
+
+        "Return tokens for 's'."
+
+        return list(map(self.get_token, get_token_texts(s)))
+
+class LexiconAnalyser:
+
+    "A way of analysing fragment text using a lexicon."
+
+    def __init__(self, lexicon, pretokenised=False):
+
+        """
+        Initialise the analyser with 'lexicon'. If 'pretokenised' is set to a
+        true value, the words of each fragment are used directly as tokens
+        instead of tokenising the fragment text.
+        """
+
+        self.lexicon = lexicon
+        self.pretokenised = pretokenised
+
+    def get_tokens(self, fragment):
+
+        "Return tokens for 'fragment'."
+
+        if self.pretokenised:
+            return list(map(self.lexicon.get_token, fragment.words))
+        else:
+            return self.lexicon.get_tokens(fragment.get_text())
+
+    def process_fragments(self, fragments, ops):
+
+        "Process the 'fragments' using the given 'ops'."
+
+        ops = [init_result] + ops + [complete_result]
+
+        for fragment in fragments:
+            fragment.words = process_doc(self.get_tokens(fragment), ops)
+
+# Lexicon compilation.
+
+class LexiconCompiler:
+
+    """
+    A collection of word analyses from which a lexicon is compiled, choosing
+    the most frequent analysis for each word.
+    """
+
+    def __init__(self):
+        self.analyses = {}
+
+    def add(self, word, tag, lemma, count=1):
+
+        "Record an analysis of 'word' as having 'tag' and 'lemma'."
+
+        analyses = self.analyses.get(word)
+
+        if analyses is None:
+            analyses = self.analyses[word] = CountingDict()
+
+        analyses[(sys.intern(tag), lemma)] += count
+
+    def add_tokens(self, tokens):
+
+        "Record the analyses in 'tokens' given as (text, tag, lemma) tuples."
+
+        for word, tag, lemma in tokens:
+            self.add(word, tag, lemma)
+
+    def add_terms(self, terms):
+
+        "Record the analyses of 'terms'."
+
+        for term in terms:
+            self.add(term.word, term.tag, term.normalised)
+
+    def get_lexicon(self):
+
+        "Return a lexicon containing the most frequent analysis of each word."
+
+        entries = {}
+
+        for word, analyses in self.analyses.items():
+            l = list(analyses.items())
+            l.sort(key=lambda t: (-t[1], t[0]))
+            entries[word] = l[0][0]
+
+        return Lexicon(entries)
+
+def add_from_file(compiler, filename, lang=None, tag="NOUN"):
+
+    """
+    Record the analyses in 'filename' using 'compiler'. A filename ending in
+    ".db" indicates a token cache, with any 'lang' restricting the texts used.
+    A filename of "fragments.txt" indicates a fragments file. Other files are
+    read as lexicon files, with each line providing a word followed by an
+    optional tag and lemma, with 'tag' being used where the tag is omitted.
+    """
+
+    if filename.endswith(".db"):
+        for text, tokens in get_cached_tokens(filename, lang):
+            compiler.add_tokens(tokens)
+
+    elif basename(filename) == "fragments.txt":
+        for fragment in get_serialised_fragments(filename):
+            compiler.add_terms(fragment.words)
+
+    else:
+        f = codecs.open(filename, encoding="utf-8")
+        try:
+            for line in f.readlines():
+                details = line.split()
+                if not details:
+                    continue
+
+                word = details[0]
+                compiler.add(word, len(details) > 1 and details[1] or tag,
+                             len(details) > 2 and details[2] or word)
+        finally:
+            f.close()
+
+def get_lexicon_from_file(filename):
+
+    "Return a lexicon for the entries defined in 'filename'."
+
+    if not filename:
+        return None
+
+    compiler = LexiconCompiler()
+    add_from_file(compiler, filename)
+    return compiler.get_lexicon()
+
+def show_lexicon(lexicon, filename):
+
+    "Show the entries in 'lexicon' in 'filename'."
+
+    out = codecs.open(filename, "w", encoding="utf-8")
+    try:
+        for word, (tag, lemma) in sorted(lexicon.entries.items()):
+            print(word, tag, lemma, file=out)
+    finally:
+        out.close()
+
+# Agreement with language model analysis.
+
+def get_agreement(lexicon, texts):
+
+    """
+    Return a dictionary of counts describing the agreement of 'lexicon' with
+    the analysis of 'texts', given as (text, tokens) tuples with each tokens
+    value being a list of (text, tag, lemma) tuples, together with a
+    dictionary counting the tags given by the lexicon for each differing tag.
+    """
+
+    counts = CountingDict()
+    confusion = CountingDict()
+
+    for text, tokens in texts:
+        counts["texts"] += 1
+
+        if get_token_texts(text) == list(map(lambda t: t[0], tokens)):
+            counts["tokenisation"] += 1
+
+        for word, tag, lemma in tokens:
+            counts["tokens"] += 1
+            details = lexicon.get(word)
+
+            if details is None:
+                counts["unknown"] += 1
+                details = (unknown_tag, word)
+
+            same_tag = details[0] == tag
+            same_lemma = details[1] == lemma
+
+            if same_tag:
+                counts["tags"] += 1
+            else:
+                confusion[(tag, details[0])] += 1
+
+            if same_lemma:
+                counts["lemmas"] += 1
+
+            if same_tag and same_lemma:
+                counts["both"] += 1
+
+    return counts, confusion
+
+def show_agreement(counts, confusion, out, shown_confusions=10):
+
+    "Show agreement 'counts' and tag 'confusion' details using 'out'."
+
+    def percentage(key, total):
+        return "%6.2f%% (%d of %d)" % (
+            total and 100.0 * counts[key] / total or 0.0, counts[key], total)
+
+    texts = counts["texts"]
+    tokens = counts["tokens"]
+
+    print("Texts:           %d" % texts, file=out)
+    print("Tokenisation:    %s" % percentage("tokenisation", texts), file=out)
+    print("Tokens:          %d" % tokens, file=out)
+    print("Tags:            %s" % percentage("tags", tokens), file=out)
+    print("Lemmas:          %s" % percentage("lemmas", tokens), file=out)
+    print("Tags and lemmas: %s" % percentage("both", tokens), file=out)
+    print("Unknown words:   %s" % percentage("unknown", tokens), file=out)
+
+    l = list(confusion.items())
+    l.sort(key=lambda t: (-t[1], t[0]))
+
+    if l:
+        print(file=out)
+        print("Model tag  Lexicon tag  Tokens", file=out)
+
+    for (tag, lexicon_tag), count in l[:shown_confusions]:
+        print("%-10s %-12s %d" % (tag, lexicon_tag, count), file=out)
+
+
+
+# Help text for program invocation.
+
+progname = basename(sys.argv[0])
+
+helptext = """\
+Usage: %s [ <options> ] <lexicon file> <input file>...
+
+Compile a lexicon, writing it to the indicated lexicon file, from the input
+files. An input file may be a token cache (with a filename ending in ".db")
+or a fragments file (named "fragments.txt") produced by build.py, or a lexicon
+or word list file providing on each line a word followed by an optional tag and
+lemma.
+
+Options:
+
+--lang <language code>  Only read texts in the indicated language from token
+                        caches
+
+--report <token cache>  Instead of compiling a lexicon, report the agreement of
+                        the lexicon file with the analysis of the texts in the
+                        indicated token cache
+
+--tag <tag>             Indicate the tag for words given without a tag in lexicon
+                        and word list files (default is "NOUN")
+
+A lexicon can be used by build.py with the --lexicon option.
+""" % progname
+
+
+
+# Main program.
+
+if __name__ == "__main__":
+
+    # Show the help message if requested.
+
+    if get_flag("--help"):
+        print(helptext, file=sys.stderr)
+        sys.exit(0)
+
+    lang = get_option("--lang")
+    report = get_option("--report")
+    tag = get_option("--tag", missing="NOUN")
+
+    # Obtain filenames.
+
+    try:
+        lexicon_filename = sys.argv[1]
+        filenames = sys.argv[2:]
+
+        if not report:
+            need_at_least_one_filename = filenames[0]
+
+    # Show the help message and exit if the arguments are incorrect.
+
+    except (IndexError, ValueError):
+        print(helptext, file=sys.stderr)
+        sys.exit(1)
+
+    # Report agreement with cached language model analysis.
+
+    if report:
+        lexicon = get_lexicon_from_file(lexicon_filename)
+        counts, confusion = get_agreement(lexicon, get_cached_tokens(report, lang))
+        show_agreement(counts, confusion, sys.stdout)
+
+    # Compile a lexicon.
+
+    else:
+        compiler = LexiconCompiler()
+
+        for filename in filenames:
+            add_from_file(compiler, filename, lang, tag)
+
+        show_lexicon(compiler.get_lexicon(), lexicon_filename)
+
+# vim: tabstop=4 expandtab shiftwidth=4
@@ -4,7 +4,6 @@ import struct
 import time
 
 import numpy as np
-import matplotlib.pyplot as plt
 
 from collections import deque
 
@@ -49,6 +48,8 @@ def stream_plotter(x, y, line,
                    ymin, ymax,
                    labels,
                    title='', pause=0.01):
+    # matplotlib is only imported when metrics are first plotted
+    import matplotlib.pyplot as plt
     if line[0]==[]:
         plt.ion()
         fig = plt.figure(figsize=(10,7))
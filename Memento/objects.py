@@ -20,29 +20,33 @@ You should have received a copy of the GNU General Public License along with
 this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from text import text_from_words
-from utils import Comparable, CountingDict
-from vectors import combine_term_vectors, get_term_vector_similarity
+from text import normalise_words, text_from_words
+from utils import Comparable, CountingDict, Keyed
+from vectors import TermVector, combine_term_vectors, get_term_vector_similarity
 
+from array import array
 from collections import defaultdict
 from itertools import combinations
 from math import log
+from weakref import WeakValueDictionary
 import re
 import os.path
+import sys
 
-class Category(Comparable):
+class Category(Keyed):
 
-    "A complete category description featuring a parent and child category."
+    """
+    A complete category description featuring a parent and child category.
+    Categories are compared using a key computed upon initialisation and
+    should not be modified.
+    """
+
+    __slots__ = ("parent", "category", "key")
 
     def __init__(self, parent, category):
         self.parent = parent
         self.category = category
-
-    def to_operand(self, value):
-        return value and value.as_tuple()
-
-    def __hash__(self):
-        return hash(self.as_tuple())
+        self.key = (parent, category)
 
     def __repr__(self):
         return "Category(%r, %r)" % self.as_tuple()
@@ -51,7 +55,7 @@ class Category(Comparable):
         return "%s-%s" % self.as_tuple()
 
     def as_tuple(self):
-        return (self.parent, self.category)
+        return self.key
 
     def complete(self):
 
@@ -71,11 +75,15 @@ class Connection(Comparable):
 
     "A connection between textual fragments."
 
-    def __init__(self, similarity, fragments):
+    __slots__ = ("fragments", "_similarity", "similarity_measure")
+
+    def __init__(self, similarity, fragments, measure=None):
 
         """
         Initialise a connection with the given 'similarity' and 'fragments'
-        involved.
+        involved. Any overall similarity 'measure' already computed may also be
+        given. Where 'similarity' is None, it is computed from the fragments
+        when needed.
         """
 
         # Permit initialisation using an empty list for later population,
@@ -85,8 +93,18 @@ class Connection(Comparable):
             raise ValueError(fragments)
 
         self.fragments = fragments
-        self.similarity = similarity
-        self.similarity_measure = None
+        self._similarity = similarity
+        self.similarity_measure = measure
+
+    def get_similarity(self):
+        if self._similarity is None and self.fragments:
+            self._similarity = get_fragment_similarity(self.fragments)
+        return self._similarity
+
+    def set_similarity(self, similarity):
+        self._similarity = similarity
+
+    similarity = property(get_similarity, set_similarity)
 
     def to_operand(self, value):
 
@@ -144,10 +162,12 @@ class Connection(Comparable):
 
         return self.measure()
 
-class Fragment(Comparable):
+class Fragment:
 
     "A fragment of text from a transcript."
 
+    __slots__ = ("source", "category", "words", "text", "vector")
+
     def __init__(self, source, category, words=None, text=None):
 
         """
@@ -162,26 +182,54 @@ class Fragment(Comparable):
         self.text = text
         self.vector = None
 
-    def to_operand(self, value):
+    def get_key(self):
 
         """
         For comparisons, use the origin details of the fragment. This is used to
         order the fragments chronologically within source transcripts.
         """
 
-        return value.source
+        return self.source.key
 
-    def __contains__(self, other):
+    key = property(get_key)
 
-        "Match 'other' to the terms in this fragment."
+    # Compare source keys directly instead of obtaining the fragment keys.
 
-        return other in self.words and other or None
+    def __lt__(self, other):
+        return self.source.key < other.source.key
+
+    def __le__(self, other):
+        return self.source.key <= other.source.key
+
+    def __gt__(self, other):
+        return self.source.key > other.source.key
+
+    def __ge__(self, other):
+        return self.source.key >= other.source.key
+
+    def __eq__(self, other):
+        try:
+            return self.source.key == other.source.key
+        except AttributeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        try:
+            return self.source.key != other.source.key
+        except AttributeError:
+            return NotImplemented
 
     def __hash__(self):
 
         "Permit the fragment to be used as a dictionary key."
 
-        return hash(self.source)
+        return hash(self.source.key)
+
+    def __contains__(self, other):
+
+        "Match 'other' to the terms in this fragment."
+
+        return other in self.words and other or None
 
     def __bool__(self):
 
@@ -249,32 +297,44 @@ class Fragment(Comparable):
     def label(self):
         return str(self)
 
-class Source(Comparable):
+class Source(Keyed):
 
-    "A fragment source."
+    """
+    A fragment source. Timings are held as integer numbers of milliseconds,
+    permitting exact comparisons between sources using a key computed upon
+    initialisation.
+    """
+
+    __slots__ = ("filename", "start_ms", "end_ms", "key")
 
-    def __init__(self, filename, start, end):
+    def __init__(self, filename, start, end, milliseconds=False):
 
         """
         Initialise a source with the given 'filename' and 'start' and 'end'
-        timings.
+        timings. The timings are given in seconds, either as numbers or as
+        strings, unless 'milliseconds' is set to a true value, in which case
+        they are given as integer numbers of milliseconds.
         """
 
         self.filename = os.path.split(filename)[-1]
-        self.start = start
-        self.end = end
 
-    def to_operand(self, value):
-
-        "For comparisons, treat a 'value' as a tuple."
+        if milliseconds:
+            self.start_ms = start
+            self.end_ms = end
+        else:
+            self.start_ms = get_milliseconds(start)
+            self.end_ms = get_milliseconds(end)
 
-        return value.as_tuple()
+        self.key = (self.filename, self.start_ms, self.end_ms)
 
-    def __hash__(self):
+    def get_start(self):
+        return self.start_ms / 1000.0
 
-        "Permit the source to be used as a dictionary key."
+    def get_end(self):
+        return self.end_ms / 1000.0
 
-        return hash(self.as_tuple())
+    start = property(get_start)
+    end = property(get_end)
 
     def __repr__(self):
         return "Source(%r, %r, %r)" % self.as_tuple()
@@ -300,9 +360,14 @@ class Source(Comparable):
     def label(self):
         return str(self)
 
-class Term(Comparable):
+class Term:
+
+    """
+    A simple tagged term. Terms obtained using the 'get_term' function are
+    shared and should not be modified.
+    """
 
-    "A simple tagged term."
+    __slots__ = ("word", "tag", "normalised", "key", "__weakref__")
 
     def __init__(self, word, tag=None, normalised=None):
 
@@ -315,17 +380,30 @@ class Term(Comparable):
         self.tag = tag
         self.normalised = normalised
 
-    def to_operand(self, value):
+        # For comparisons, use the normalised form if possible.
 
-        "For comparisons, use the normalised forms if possible."
+        self.key = normalised or word
 
-        if self.normalised and isinstance(value, Term) and value.normalised:
-            return value.normalised
-        else:
-            return str(value)
+    def __lt__(self, other):
+        return self.key < (isinstance(other, Term) and other.key or str(other))
+
+    def __le__(self, other):
+        return self.key <= (isinstance(other, Term) and other.key or str(other))
+
+    def __gt__(self, other):
+        return self.key > (isinstance(other, Term) and other.key or str(other))
+
+    def __ge__(self, other):
+        return self.key >= (isinstance(other, Term) and other.key or str(other))
+
+    def __eq__(self, other):
+        return self.key == (isinstance(other, Term) and other.key or str(other))
+
+    def __ne__(self, other):
+        return self.key != (isinstance(other, Term) and other.key or str(other))
 
     def __hash__(self):
-        return hash(self.normalised or str(self))
+        return hash(self.key)
 
     def __repr__(self):
         return "Term(%r, %r, %r)" % (self.word, self.tag, self.normalised)
@@ -333,6 +411,51 @@ class Term(Comparable):
     def __str__(self):
         return self.word
 
+# Shared terms, mapping (word, tag, normalised) tuples to terms retained while
+# in use.
+
+_terms = WeakValueDictionary()
+
+def get_term(word, tag=None, normalised=None):
+
+    """
+    Return a term for the actual 'word', optional part-of-speech 'tag' and
+    'normalised' form, sharing any existing term having the same details.
+    """
+
+    key = (word, tag, normalised)
+    term = _terms.get(key)
+
+    if term is None:
+        if tag is not None:
+            tag = sys.intern(tag)
+        term = _terms[key] = Term(word, tag, normalised)
+
+    return term
+
+# Timing conversion.
+
+def get_milliseconds(value):
+
+    """
+    Return 'value', being a number of seconds given as a number or string, as
+    an integer number of milliseconds.
+    """
+
+    # Convert plain decimal strings exactly.
+
+    if isinstance(value, str):
+        whole, sep, fraction = value.strip().partition(".")
+
+        if (whole.isdigit() or not whole and fraction) and \
+           (fraction.isdigit() or not fraction) and len(fraction) <= 3:
+
+            return int(whole or "0") * 1000 + int(fraction.ljust(3, "0"))
+
+        value = float(value)
+
+    return int(round(value * 1000))
+
 # Fragment collection operations.
 
 def commit_text(fragments):
@@ -342,19 +465,20 @@ def commit_text(fragments):
     for fragment in fragments:
         fragment.commit_text()
 
-def compare_fragments(fragments, terms_to_fragments=None):
+def compare_fragments(fragments, terms_to_fragments=None, selected=None):
 
     """
     Compare 'fragments' with each other, returning a list of connections
     sorted by the similarity measure. The 'terms_to_fragments' mapping, if
-    provided, is used to optimise the fragment pairing process.
+    provided, is used to optimise the fragment pairing process. If 'selected'
+    is provided, only pairs involving the selected fragments are compared.
     """
 
     connections = []
 
     # Compare the fragment pairs.
 
-    for pair in get_fragment_pairs(fragments, terms_to_fragments):
+    for pair in get_fragment_pairs(fragments, terms_to_fragments, selected):
         similarity = get_fragment_similarity(pair)
 
         # Only record connections when some similarity exists.
@@ -371,7 +495,17 @@ def fix_category_names(fragments, category_map):
     for fragment in fragments:
         fix = category_map.get(fragment.category.parent)
         if fix:
-            fragment.category.parent = fix
+            fragment.category = Category(fix, fragment.category.category)
+
+def normalise_fragments(fragments):
+
+    """
+    Normalise the words in 'fragments', preserving the original text of each
+    fragment with normalised accents and removing punctuation from the words.
+    """
+
+    for fragment in fragments:
+        fragment.text, fragment.words = normalise_words(fragment.words)
 
 def get_all_words(fragments):
 
@@ -397,15 +531,26 @@ def get_fragment_categories(fragments):
 
     return d
 
-def get_fragment_pairs(fragments, terms_to_fragments=None):
+def get_fragment_pairs(fragments, terms_to_fragments=None, selected=None):
 
-    "Get pairs of 'fragments' to compare."
+    """
+    Get pairs of 'fragments' to compare. If 'selected' is specified as a
+    collection of fragments, only pairs involving those fragments are obtained.
+    """
+
+    if selected is not None:
+        selected = set(selected)
+        candidates = list(filter(lambda f: f in selected, fragments))
+    else:
+        candidates = fragments
 
     if terms_to_fragments:
         pairs = []
 
-        for f1 in fragments:
+        for f1 in candidates:
+            key = f1.source.key
             others = set()
+            earlier = set()
 
             # For each term, find fragments containing that term.
 
@@ -420,13 +565,28 @@ def get_fragment_pairs(fragments, terms_to_fragments=None):
                 # Obtain fragments that have not already been paired.
 
                 for f2 in others_for_term:
-                    if f1.source < f2.source:
+                    if key < f2.source.key:
                         others.add(f2)
 
+                    # Pair unselected fragments with earlier sources since they
+                    # will not be visited themselves.
+
+                    elif selected is not None and f2.source.key < key and \
+                         f2 not in selected:
+                        earlier.add(f2)
+
             for f2 in others:
                 pairs.append((f1, f2))
 
+            for f2 in earlier:
+                pairs.append((f2, f1))
+
         return pairs
+
+    elif selected is not None:
+        return list(filter(lambda p: p[0] in selected or p[1] in selected,
+                           combinations(fragments, 2)))
+
     else:
         return list(combinations(fragments, 2))
 
@@ -484,17 +644,23 @@ def process_fragments(fragments, processes):
         for process in processes:
             fragment.words = process(fragment.words)
 
-def process_term_vectors(fragments, frequencies=True, mapping=None):
+def process_term_vectors(fragments, frequencies=True, mapping=None,
+                         vocabulary=None):
 
     """
     Process term vectors from 'fragments', employing term frequencies if the
     'frequencies' indicator is set to a true value, and employing any 'mapping'
-    to scale term weights.
+    to scale term weights. If 'vocabulary' is specified, array-based term
+    vectors employing the vocabulary's term identifiers are produced.
     """
 
     for fragment in fragments:
         vector = fragment.get_term_vector(frequencies)
         scale_term_vector(vector, mapping)
+
+        if vocabulary is not None:
+            vector = vocabulary.get_vector(vector)
+
         fragment.set_term_vector(vector)
 
 def recompute_connections(connections):
@@ -521,9 +687,21 @@ def scale_connections(connections, mapping=None):
 
 def scale_term_vector(vector, mapping=None):
 
-    "Scale the 'vector' using a term 'mapping' to weights."
+    """
+    Scale the 'vector' using a term 'mapping' to weights. Where 'vector' is an
+    array-based term vector, 'mapping' may also be an array of weights indexed
+    by term identifier.
+    """
+
+    if not mapping:
+        return
 
-    if mapping:
+    if isinstance(vector, TermVector):
+        if not isinstance(mapping, array):
+            mapping = vector.vocabulary.get_weights(mapping)
+        vector.scale(mapping)
+
+    else:
         for word, weight in vector.items():
             vector[word] = weight * (mapping.get(word) or 1)
 
@@ -119,6 +119,35 @@ def show_all_words(words, filename):
     finally:
         out.close()
 
+def show_source_digests(digests, filename):
+
+    "Show 'digests', given as (source, digest) tuples, in 'filename'."
+
+    out = codecs.open(filename, "w", encoding="utf-8")
+    try:
+        for source, digest in digests:
+            print(digest, source, file=out)
+    finally:
+        out.close()
+
+def show_timings(timings, filename):
+
+    """
+    Show 'timings', mapping names to durations in seconds, in 'filename', with
+    the longest durations first.
+    """
+
+    l = list(timings.items())
+    l.sort(key=lambda t: (-t[1], t[0]))
+
+    out = codecs.open(filename, "w", encoding="utf-8")
+    try:
+        for name, duration in l:
+            print("%-20s %10.3f" % (name, duration), file=out)
+        print("%-20s %10.3f" % ("total", sum(timings.values())), file=out)
+    finally:
+        out.close()
+
 def show_category_terms(category_terms, filename):
 
     """
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8
+
+"""
+Compare separate and single-pass term grouping and filtering.
+
+Run from the main directory of the distribution as follows:
+
+PYTHONPATH=. scripts/bench_grouping.py [ <number of terms> ]
+
+A synthetic stream of tagged terms is divided into fragments which are grouped
+and filtered using the separate name grouping, quantity grouping and
+part-of-speech filtering passes as well as using the single-pass grouper, with
+the best time taken over several runs being reported for each approach.
+"""
+
+from grouping import TermGrouper, group_words
+from objects import Term
+from stopwords import POSFilter
+
+from time import perf_counter
+import sys
+
+terms = [Term("Juan", "PROPN", "Juan"), Term("Pérez", "PROPN", "Pérez"),
+         Term("vive", "VERB", "vivir"), Term("en", "ADP", "en"),
+         Term("Santiago", "PROPN", "Santiago"), Term("de", "ADP", "de"),
+         Term("Chile", "PROPN", "Chile"), Term("desde", "ADP", "desde"),
+         Term("hace", "VERB", "hacer"), Term("10", "NUM", "10"),
+         Term("años", "NOUN", "año"), Term("con", "ADP", "con"),
+         Term("la", "DET", "el"), Term("familia", "NOUN", "familia"),
+         Term(".", "PUNCT", ".")]
+
+posfilter = POSFilter()
+grouper = TermGrouper(tags=posfilter.tags)
+
+def separate(fragments):
+    for words in fragments:
+        posfilter.filter_words(group_words(words))
+
+def single(fragments):
+    for words in fragments:
+        grouper.group_words(words)
+
+def main():
+    num_terms = len(sys.argv) > 1 and int(sys.argv[1]) or 1000000
+    fragment_terms = 20
+
+    stream = [terms[i % len(terms)] for i in range(0, num_terms)]
+    fragments = [stream[i:i+fragment_terms] for i in range(0, num_terms, fragment_terms)]
+
+    # Report the best of several runs of each approach.
+
+    for label, fn in [("separate", separate), ("single", single)]:
+        durations = []
+
+        for i in range(0, 5):
+            start = perf_counter()
+            fn(fragments)
+            durations.append(perf_counter() - start)
+
+        print("%-10s %8.3fs" % (label, min(durations)))
+
+if __name__ == "__main__":
+    main()
+
+# vim: tabstop=4 expandtab shiftwidth=4
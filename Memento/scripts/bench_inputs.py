@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8
+
+"""
+Compare document-based and streaming transcript parsing.
+
+Run from the main directory of the distribution as follows:
+
+PYTHONPATH=. scripts/bench_inputs.py [ <number of words> ]
+
+Synthetic text and tiers files are written to a temporary directory and read
+using both approaches, with the time taken and the peak memory allocated being
+reported for each approach.
+"""
+
+from inputs import get_fragments_from_source, \
+                   get_fragments_from_source_documents
+
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import codecs
+import sys
+import tracemalloc
+
+words = ["un", "pollo", "entra", "en", "el", "bosque", "y", "una", "bellota",
+         "cae", "en", "su", "cabeza", "."]
+
+def write_data(dirname, num_words, fragment_words=20):
+
+    "Write synthetic data to 'dirname' returning a filename mapping."
+
+    filenames = {"Text" : join(dirname, "A1_Text.xml"),
+                 "Tiers" : join(dirname, "A1_Tiers.xml")}
+
+    out = codecs.open(filenames["Text"], "w", encoding="utf-8")
+    try:
+        print("<TIERS>\n  <TIER columns=\"Speech\">", file=out)
+        for i in range(0, num_words):
+            print("    <span start=\"%d.000\" end=\"%d.000\"><v>%s</v></span>" % (
+                  i, i + 1, words[i % len(words)]), file=out)
+        print("  </TIER>\n</TIERS>", file=out)
+    finally:
+        out.close()
+
+    out = codecs.open(filenames["Tiers"], "w", encoding="utf-8")
+    try:
+        print("<TIERS>\n  <TIER columns=\"Parent\">", file=out)
+        for i in range(0, num_words, fragment_words):
+            print("    <span start=\"%d.000\" end=\"%d.000\"><v>Category %d</v></span>" % (
+                  i, i + fragment_words, i % 7), file=out)
+        print("  </TIER>\n</TIERS>", file=out)
+    finally:
+        out.close()
+
+    return filenames
+
+def measure(fn, filenames):
+
+    "Return the time taken and peak memory used by 'fn' with 'filenames'."
+
+    start = perf_counter()
+    fragments = fn("A1", filenames)
+    duration = perf_counter() - start
+    del fragments
+
+    tracemalloc.start()
+    fragments = fn("A1", filenames)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return duration, peak
+
+def main():
+    num_words = len(sys.argv) > 1 and int(sys.argv[1]) or 200000
+
+    with TemporaryDirectory() as dirname:
+        filenames = write_data(dirname, num_words)
+
+        for label, fn in [("documents", get_fragments_from_source_documents),
+                          ("streaming", get_fragments_from_source)]:
+
+            duration, peak = measure(fn, filenames)
+            print("%-10s %8.3fs %10.1f KiB" % (label, duration, peak / 1024.0))
+
+if __name__ == "__main__":
+    main()
+
+# vim: tabstop=4 expandtab shiftwidth=4
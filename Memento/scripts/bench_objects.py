@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8
+
+"""
+Compare the memory used by plain and compact fragment objects.
+
+Run from the main directory of the distribution as follows:
+
+PYTHONPATH=. scripts/bench_objects.py [ <number of fragments> ]
+
+A synthetic corpus of fragments is produced using plain classes, each instance
+having its own attribute dictionary and each occurrence of a word having its
+own term, as well as using the compact classes and shared terms, with the
+memory allocated for each corpus being reported. The memory allocated for a
+fragment store holding the corpus is also reported.
+"""
+
+from objects import Category, Fragment, Source, get_term
+from store import FragmentStore
+
+import gc
+import sys
+import tracemalloc
+
+words = """\
+Un día un pollo entra en un bosque . Una bellota cae en su cabeza . El pobre
+pollo cree que el cielo ha caído sobre él . Corre para informar al rey , y
+en el camino encuentran un pavo ; la zorra dice : ¿ quiere enseñarles el
+camino al palacio del rey ? Aquí la zorra y sus cachorros se comen el pobre
+pollo , la gallina , el gallo , el pato , el ganso y el pavo . Volvió a casa
+""".split()
+
+tags = ["ADJ", "ADP", "DET", "NOUN", "PROPN", "PUNCT", "VERB"]
+
+# The plain classes formerly employed.
+
+class PlainCategory:
+    def __init__(self, parent, category):
+        self.parent = parent
+        self.category = category
+
+class PlainFragment:
+    def __init__(self, source, category, words=None, text=None):
+        self.source = source
+        self.category = category
+        self.words = words or []
+        self.text = text
+        self.vector = None
+
+class PlainSource:
+    def __init__(self, filename, start_ms, end_ms):
+        self.filename = filename
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+
+class PlainTerm:
+    def __init__(self, word, tag=None, normalised=None):
+        self.word = word
+        self.tag = tag
+        self.normalised = normalised
+
+def get_corpus(num_fragments, fragment_words, category_cls, fragment_cls,
+               source_cls, term_cls):
+
+    "Generate a corpus of 'num_fragments' using the given classes."
+
+    for i in range(0, num_fragments):
+        start = i * fragment_words
+        l = []
+
+        # Produce new strings for each word as an analyser would.
+
+        for j in range(start, start + fragment_words):
+            word = words[j % len(words)]
+            l.append(term_cls("%s" % word, tags[j % len(tags)], word.lower()))
+
+        source = source_cls("A%d_Text.xml" % (i % 50), i * 1000, i * 1000 + 999)
+        category = category_cls("Parent%d" % (i % 10), "Child%d" % (i % 7))
+        yield fragment_cls(source, category, l)
+
+def main():
+    num_fragments = len(sys.argv) > 1 and int(sys.argv[1]) or 100000
+    fragment_words = 20
+
+    plain = (PlainCategory, PlainFragment, PlainSource, PlainTerm)
+    compact = (Category, Fragment,
+               lambda filename, start, end: Source(filename, start, end, True),
+               get_term)
+
+    for label, classes, collection in [
+        ("plain", plain, list),
+        ("compact", compact, list),
+        ("store", compact, FragmentStore),
+        ]:
+
+        gc.collect()
+        tracemalloc.start()
+        corpus = collection(get_corpus(num_fragments, fragment_words, *classes))
+        size, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print("%-10s %8.1f MiB" % (label, size / 1048576.0))
+        del corpus
+
+if __name__ == "__main__":
+    main()
+
+# vim: tabstop=4 expandtab shiftwidth=4
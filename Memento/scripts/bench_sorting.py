@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8
+
+"""
+Compare dynamically dispatched and key-based object comparisons.
+
+Run from the main directory of the distribution as follows:
+
+PYTHONPATH=. scripts/bench_sorting.py [ <number of fragments> ]
+
+A synthetic collection of fragments is sorted, its sources compared pairwise
+as when pairing fragments, and its related fragment details sorted as when
+producing output, using classes comparing operands obtained for each
+comparison as well as using the current classes with precomputed keys, with
+the best time taken over several runs being reported for each approach.
+"""
+
+from objects import Category, Fragment, Source, get_term
+
+from random import Random
+from time import perf_counter
+import operator
+import sys
+
+words = """\
+Un día un pollo entra en un bosque . Una bellota cae en su cabeza . El pobre
+pollo cree que el cielo ha caído sobre él . Corre para informar al rey , y
+en el camino encuentran un pavo ; la zorra dice : ¿ quiere enseñarles el
+camino al palacio del rey ? Aquí la zorra y sus cachorros se comen el pobre
+""".split()
+
+# The comparison mechanism formerly employed.
+
+class Comparable:
+    def compare(self, op, other):
+        return op(self.to_operand(self), self.to_operand(other))
+
+    def to_operand(self, value):
+        return value
+
+    def __lt__(self, other):
+        return self.compare(operator.lt, other)
+
+    def __eq__(self, other):
+        return self.compare(operator.eq, other)
+
+class OperandCategory(Comparable):
+    def __init__(self, parent, category):
+        self.parent = parent
+        self.category = category
+
+    def to_operand(self, value):
+        return value and (value.parent, value.category)
+
+    def __hash__(self):
+        return hash((self.parent, self.category))
+
+class OperandFragment(Comparable):
+    def __init__(self, source, category, words=None):
+        self.source = source
+        self.category = category
+        self.words = words or []
+
+    def to_operand(self, value):
+        return value.source
+
+    def __hash__(self):
+        return hash(self.source)
+
+class OperandSource(Comparable):
+    def __init__(self, filename, start_ms, end_ms, milliseconds=True):
+        self.filename = filename
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+
+    def to_operand(self, value):
+        return (value.filename, value.start_ms, value.end_ms)
+
+    def __hash__(self):
+        return hash((self.filename, self.start_ms, self.end_ms))
+
+class OperandTerm(Comparable):
+    def __init__(self, word, tag=None, normalised=None):
+        self.word = word
+        self.tag = tag
+        self.normalised = normalised
+
+    def to_operand(self, value):
+        if self.normalised and isinstance(value, OperandTerm) and value.normalised:
+            return value.normalised
+        else:
+            return str(value)
+
+    def __hash__(self):
+        return hash(self.normalised or str(self))
+
+    def __str__(self):
+        return self.word
+
+# Benchmarks.
+
+def get_fragments(num_fragments, category_cls, fragment_cls, source_cls,
+                  term_cls):
+
+    "Return 'num_fragments' shuffled fragments using the given classes."
+
+    fragments = []
+
+    for i in range(0, num_fragments):
+        l = []
+        for j in range(i, i + 10):
+            word = words[j % len(words)]
+            l.append(term_cls(word, "NOUN", word.lower()))
+
+        source = source_cls("A%d_Text.xml" % (i % 20), i * 1000, i * 1000 + 999, True)
+        category = category_cls("Parent%d" % (i % 10), "Child%d" % (i % 7))
+        fragments.append(fragment_cls(source, category, l))
+
+    Random(0).shuffle(fragments)
+    return fragments
+
+def sort_fragments(fragments):
+    l = list(fragments)
+    l.sort()
+
+def compare_sources(fragments):
+    sources = list(map(lambda f: f.source, fragments[:2000]))
+    for s1 in sources:
+        for s2 in sources:
+            s1 < s2
+
+def sort_related(fragments):
+    l = list(map(lambda f: (f, []), fragments))
+    l.sort()
+
+def sort_terms(fragments):
+    l = []
+    for fragment in fragments[:20000]:
+        l += fragment.words
+    l.sort()
+
+def main():
+    num_fragments = len(sys.argv) > 1 and int(sys.argv[1]) or 100000
+
+    collections = [
+        ("operand", get_fragments(num_fragments, OperandCategory,
+                                  OperandFragment, OperandSource, OperandTerm)),
+        ("key", get_fragments(num_fragments, Category, Fragment, Source,
+                              get_term)),
+        ]
+
+    for name, fn in [("fragments", sort_fragments), ("sources", compare_sources),
+                     ("related", sort_related), ("terms", sort_terms)]:
+
+        for label, fragments in collections:
+            durations = []
+
+            for i in range(0, 5):
+                start = perf_counter()
+                fn(fragments)
+                durations.append(perf_counter() - start)
+
+            print("%-10s %-10s %8.3fs" % (name, label, min(durations)))
+
+if __name__ == "__main__":
+    main()
+
+# vim: tabstop=4 expandtab shiftwidth=4
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8
+
+"""
+Compare chained and fused word normalisation.
+
+Run from the main directory of the distribution as follows:
+
+PYTHONPATH=. scripts/bench_text.py [ <number of words> ]
+
+A synthetic stream of words is divided into fragments and normalised using the
+separate accent normalisation, text production and punctuation removal passes
+as well as using the fused normaliser.
+"""
+
+from text import normalise_accents, normalise_words, punctuation, \
+                 text_from_words
+
+from time import perf_counter
+import sys
+
+words = """\
+Un día un pollo entra en un bosque . Una bellota cae en su cabeza . El pobre
+pollo cree que el cielo ha caído sobre él . Corre para informar al rey , y
+en el camino encuentran un pavo ; la zorra dice : ¿ quiere enseñarles el
+camino al palacio del rey ? Aquí la zorra y sus cachorros se comen el pobre
+pollo , la gallina , el gallo , el pato , el ganso y el pavo . Volvió à casa
+""".split()
+
+# The chained passes formerly employed.
+
+def remove_punctuation(s):
+    for c in punctuation:
+        s = s.replace(c, "")
+    return s
+
+def remove_punctuation_from_word(s):
+    return remove_punctuation(s) or s
+
+def chained(fragments):
+    for words in fragments:
+        words = normalise_accents(words)
+        text = text_from_words(words)
+        words = list(map(remove_punctuation_from_word, words))
+
+def fused(fragments):
+    for words in fragments:
+        text, words = normalise_words(words)
+
+def main():
+    num_words = len(sys.argv) > 1 and int(sys.argv[1]) or 1000000
+    fragment_words = 20
+
+    stream = [words[i % len(words)] for i in range(0, num_words)]
+    fragments = [stream[i:i+fragment_words] for i in range(0, num_words, fragment_words)]
+
+    for label, fn in [("chained", chained), ("fused", fused)]:
+        start = perf_counter()
+        fn(fragments)
+        print("%-10s %8.3fs" % (label, perf_counter() - start))
+
+if __name__ == "__main__":
+    main()
+
+# vim: tabstop=4 expandtab shiftwidth=4
@@ -20,7 +20,7 @@ You should have received a copy of the GNU General Public License along with
 this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from objects import Category, Connection, Fragment, Source, Term
+from objects import Category, Connection, Fragment, Source, get_term
 
 import codecs
 import re
@@ -193,7 +193,7 @@ def get_serialised_source(value):
 
     source, period = value.split(":")
     start, end = period.split("-")
-    return Source(source, float(start), float(end))
+    return Source(source, start, end)
 
 def get_serialised_terms(value):
 
@@ -227,7 +227,7 @@ def get_term_from_summary(value, pos=0):
     # Term text by itself.
 
     if pos is None or value[pos] == " ":
-        return Term(text), pos
+        return get_term(text), pos
 
     # Term with more details.
 
@@ -237,13 +237,13 @@ def get_term_from_summary(value, pos=0):
         # Term with tag only.
 
         if pos is None or value[pos] == " ":
-            return Term(text, tag), pos
+            return get_term(text, tag), pos
 
         # Term with tag and normalised form.
 
         else:
             normalised, pos = get_quoted_text(value, pos+1)
-            return Term(text, tag, normalised), pos
+            return get_term(text, tag, normalised), pos
 
 def get_quoted_text(value, i):
 
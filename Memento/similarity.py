@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8
+
+"""
+Fragment similarity computation using sparse matrices.
+
+Copyright (C) 2018, 2019 University of Oslo
+
+This program is free software; you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation; either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details.
+
+You should have received a copy of the GNU General Public License along with
+this program.  If not, see <http://www.gnu.org/licenses/>.
+
+----
+
+The term vectors of a collection of fragments form the rows of a sparse matrix
+held in compressed sparse row (CSR) form. The dot products of all pairs of term
+vectors are obtained from the product of this matrix with its transpose, with
+the product being computed for blocks of rows so that the memory employed
+remains bounded. Each dot product is divided by the magnitudes of the vectors
+involved, giving the cosine similarity measure of each pair of fragments.
+
+SciPy is used to compute the products where it is available. Otherwise, an
+equivalent computation employing an index of the fragments featuring each term
+is used.
+"""
+
+from objects import Connection
+from vectors import TermVector, Vocabulary, magnitude
+
+from array import array
+
+# The number of matrix rows for which products are computed together.
+
+default_block_size = 1024
+
+class FragmentMatrix:
+
+    "A sparse matrix of fragment term vectors in compressed sparse row form."
+
+    def __init__(self, vectors):
+
+        """
+        Initialise the matrix from 'vectors', these being array-based term
+        vectors sharing a vocabulary or dictionaries mapping terms to weights.
+        """
+
+        vocabulary = None
+
+        self.indptr = array("q", [0])
+        self.indices = array("i")
+        self.data = array("d")
+
+        for vector in vectors:
+            if not isinstance(vector, TermVector):
+                vocabulary = vocabulary or Vocabulary()
+                vector = vocabulary.get_vector(vector)
+
+            self.indices.extend(vector.ids)
+            self.data.extend(vector.weights)
+            self.indptr.append(len(self.indices))
+
+        self.num_rows = len(self.indptr) - 1
+        self.num_columns = self.indices and max(self.indices) + 1 or 0
+
+    def get_products(self, rows, upper=False, block_size=None):
+
+        """
+        Generate a tuple of the form (row, column, product) for each nonzero
+        product of the given 'rows' with all rows of the matrix. If 'upper' is
+        set to a true value, only products with later rows are generated. The
+        products are computed for 'block_size' rows at a time.
+        """
+
+        block_size = block_size or default_block_size
+
+        try:
+            import scipy.sparse
+        except ImportError:
+            products = self.get_index_products
+        else:
+            products = self.get_scipy_products
+
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+
+            for row, column, product in products(block, upper):
+                if not upper or column > row:
+                    yield row, column, product
+
+    def get_scipy_products(self, rows, upper):
+
+        "Generate the products for 'rows' using SciPy."
+
+        import numpy
+        from scipy.sparse import csr_matrix
+
+        matrix = getattr(self, "matrix", None)
+
+        if matrix is None:
+            matrix = self.matrix = csr_matrix(
+                (numpy.frombuffer(self.data, dtype=numpy.float64),
+                 numpy.frombuffer(self.indices, dtype=numpy.int32),
+                 numpy.frombuffer(self.indptr, dtype=numpy.int64)),
+                shape=(self.num_rows, self.num_columns))
+
+        # Only compute products with later rows if requested.
+
+        offset = upper and rows[0] or 0
+
+        result = matrix[rows] @ matrix[offset:].T
+        result = result.tocsr()
+
+        indptr = result.indptr.tolist()
+        indices = result.indices.tolist()
+        data = result.data.tolist()
+
+        for i, row in enumerate(rows):
+            for k in range(indptr[i], indptr[i+1]):
+                yield row, indices[k] + offset, data[k]
+
+    def get_index_products(self, rows, upper):
+
+        """
+        Generate the products for 'rows' using an index of the rows featuring
+        each column.
+        """
+
+        index = getattr(self, "index", None)
+
+        if index is None:
+            index = self.index = [[] for i in range(0, self.num_columns)]
+
+            for row in range(0, self.num_rows):
+                for k in range(self.indptr[row], self.indptr[row+1]):
+                    index[self.indices[k]].append((row, self.data[k]))
+
+        for row in rows:
+            products = {}
+
+            for k in range(self.indptr[row], self.indptr[row+1]):
+                weight = self.data[k]
+
+                for other, other_weight in index[self.indices[k]]:
+                    if upper and other <= row:
+                        continue
+                    products[other] = products.get(other, 0) + weight * other_weight
+
+            for column, product in products.items():
+                if product:
+                    yield row, column, product
+
+def compare_fragments_by_matrix(fragments, selected=None, block_size=None):
+
+    """
+    Compare 'fragments' with each other, returning a list of connections for
+    pairs of fragments having some similarity. If 'selected' is provided, only
+    pairs involving the selected fragments are compared. The comparisons are
+    performed using matrix products computed for 'block_size' fragments at a
+    time.
+
+    The fragments must have term vectors defined. Like the 'compare_fragments'
+    function in the objects module, each pair of fragments is ordered by source,
+    and fragments with identical sources are not paired.
+    """
+
+    fragments = sorted(fragments, key=lambda f: f.source.key)
+    keys = list(map(lambda f: f.source.key, fragments))
+    vectors = list(map(lambda f: f.vector, fragments))
+    norms = list(map(magnitude, vectors))
+
+    matrix = FragmentMatrix(vectors)
+
+    # Compare all fragments with later fragments or the selected fragments with
+    # all others.
+
+    if selected is None:
+        rows = list(range(0, len(fragments)))
+        flags = None
+    else:
+        selected = set(selected)
+        flags = bytearray(map(lambda f: f in selected, fragments))
+        rows = list(filter(lambda i: flags[i], range(0, len(fragments))))
+
+    connections = []
+
+    for row, column, product in matrix.get_products(rows, selected is None,
+                                                    block_size):
+
+        # Pairs of selected fragments are obtained from the earlier fragment.
+
+        if flags is not None and (column == row or flags[column] and column < row):
+            continue
+
+        if row < column:
+            first, second = row, column
+        else:
+            first, second = column, row
+
+        if keys[first] == keys[second]:
+            continue
+
+        connections.append(Connection(None,
+                                      [fragments[first], fragments[second]],
+                                      product / (norms[first] * norms[second])))
+
+    return connections
+
+# vim: tabstop=4 expandtab shiftwidth=4
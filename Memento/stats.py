@@ -22,8 +22,8 @@ this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from objects import get_common_terms, \
                     get_fragment_categories, get_fragment_terms, \
-                    inverse_document_frequencies, \
-                    word_document_frequencies, word_frequencies
+                    inverse_document_frequencies
+from store import FragmentStore
 
 import outputs
 
@@ -31,9 +31,13 @@ import outputs
 
 # Processing and output functions.
 
-def process_statistics(fragments, out):
+def process_statistics(fragments, out, store=None):
 
-    "Process 'fragments' to obtain statistics, registering output with 'out'."
+    """
+    Process 'fragments' to obtain statistics, registering output with 'out'.
+    Any 'store' holding the fragments is scanned to obtain term frequencies,
+    with a store being populated with the fragments otherwise.
+    """
 
     # Get fragments in each category.
 
@@ -60,8 +64,11 @@ def process_statistics(fragments, out):
 
     # Get term/word frequencies.
 
-    frequencies = word_frequencies(fragments)
-    doc_frequencies = word_document_frequencies(fragments)
+    if store is None:
+        store = FragmentStore(fragments)
+
+    frequencies = store.word_frequencies()
+    doc_frequencies = store.word_document_frequencies()
     inv_doc_frequencies = inverse_document_frequencies(doc_frequencies, len(fragments))
 
     # Register some output data.
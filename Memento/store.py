@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8
+
+"""
+Columnar fragment storage.
+
+Copyright (C) 2018, 2019 University of Oslo
+
+This program is free software; you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation; either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+details.
+
+You should have received a copy of the GNU General Public License along with
+this program.  If not, see <http://www.gnu.org/licenses/>.
+
+----
+
+A fragment store holds a collection of fragments as columns of integers, with
+source filenames, participants, categories and terms each recorded once in a
+table and referenced by their identifiers. The terms of all fragments are held
+in a single array, with an array of offsets indicating the terms belonging to
+each fragment, and the text of all fragments is held in a single string, with
+an array of offsets indicating the text of each fragment.
+"""
+
+from objects import Category, Fragment, Source, Term, get_term
+from serialised import get_serialised_fragments
+from utils import CountingDict
+
+from array import array
+from collections import Counter
+from os.path import exists, getmtime
+import pickle
+
+class Table:
+
+    "A table assigning dense integer identifiers to distinct values."
+
+    def __init__(self):
+        self.values = []
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        return self.values[i]
+
+    def __getstate__(self):
+        return self.values
+
+    def __setstate__(self, values):
+        self.values = values
+        self.ids = dict(map(lambda t: (t[1], t[0]), enumerate(values)))
+
+    def get_id(self, value):
+
+        "Return the identifier of 'value', adding it to the table if necessary."
+
+        i = self.ids.get(value)
+
+        if i is None:
+            i = self.ids[value] = len(self.values)
+            self.values.append(value)
+
+        return i
+
+class FragmentStore:
+
+    "A columnar collection of fragments."
+
+    def __init__(self, fragments=None):
+
+        "Initialise the store, adding any given 'fragments'."
+
+        # Tables of values referenced by the columns.
+
+        self.filenames = Table()
+        self.participants = Table()
+        self.filename_participants = array("i")
+        self.parents = Table()
+        self.categories = Table()
+        self.terms = Table()
+
+        # The classes of terms for which terms are considered equal, each
+        # recording the first term in the class.
+
+        self.term_classes = array("i")
+        self.classes = Table()
+        self.class_terms = array("i")
+
+        # The columns describing each fragment, with -1 indicating a missing
+        # category.
+
+        self.sources = array("i")
+        self.starts = array("q")
+        self.ends = array("q")
+        self.source_participants = array("i")
+        self.fragment_parents = array("i")
+        self.fragment_categories = array("i")
+
+        # The terms and text of each fragment, with the offsets indicating the
+        # start of the details of each fragment and the end of the details of
+        # the last fragment.
+
+        self.term_ids = array("i")
+        self.term_offsets = array("q", [0])
+
+        self.text = ""
+        self.text_pending = []
+        self.text_offsets = array("q", [0])
+        self.text_present = bytearray()
+
+        if fragments:
+            self.extend(fragments)
+
+    def __len__(self):
+        return len(self.sources)
+
+    def __iter__(self):
+        for i in range(0, len(self)):
+            yield self.get_fragment(i)
+
+    def __getstate__(self):
+        self.commit_text()
+        state = dict(self.__dict__)
+        del state["text_pending"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.text_pending = []
+
+    # Table access.
+
+    def get_term_id(self, term):
+
+        "Return the identifier for 'term', being a term or a plain string."
+
+        if isinstance(term, Term):
+            value = (term.word, term.tag, term.normalised)
+            key = term.key
+        else:
+            value = key = str(term)
+
+        i = self.terms.ids.get(value)
+
+        if i is None:
+            i = self.terms.get_id(value)
+            j = self.classes.get_id(key)
+
+            if j == len(self.class_terms):
+                self.class_terms.append(i)
+
+            self.term_classes.append(j)
+
+        return i
+
+    def get_term(self, i):
+
+        "Return the term having identifier 'i'."
+
+        value = self.terms[i]
+
+        if isinstance(value, tuple):
+            return get_term(*value)
+        else:
+            return value
+
+    # Fragment addition.
+
+    def add(self, fragment):
+
+        "Add 'fragment' to the store."
+
+        source = fragment.source
+        category = fragment.category
+
+        filename = self.filenames.get_id(source.filename)
+
+        # Obtain the participant for each newly encountered filename.
+
+        if filename == len(self.filename_participants):
+            self.filename_participants.append(
+                self.participants.get_id(source.participant()))
+
+        self.sources.append(filename)
+        self.starts.append(source.start_ms)
+        self.ends.append(source.end_ms)
+        self.source_participants.append(self.filename_participants[filename])
+
+        if category is None:
+            self.fragment_parents.append(-1)
+            self.fragment_categories.append(-1)
+        else:
+            self.fragment_parents.append(self.parents.get_id(category.parent))
+            self.fragment_categories.append(self.categories.get_id(category.category))
+
+        self.term_ids.extend(map(self.get_term_id, fragment.words))
+        self.term_offsets.append(len(self.term_ids))
+
+        text = fragment.text or ""
+        self.text_pending.append(text)
+        self.text_offsets.append(self.text_offsets[-1] + len(text))
+        self.text_present.append(fragment.text is not None)
+
+    def extend(self, fragments):
+
+        "Add 'fragments' to the store."
+
+        for fragment in fragments:
+            self.add(fragment)
+
+    def commit_text(self):
+
+        "Combine any recently added text with the text buffer."
+
+        if self.text_pending:
+            self.text = "".join([self.text] + self.text_pending)
+            self.text_pending = []
+
+    # Fragment access.
+
+    def get_source(self, i):
+
+        "Return the source of fragment 'i'."
+
+        return Source(self.filenames[self.sources[i]], self.starts[i],
+                      self.ends[i], milliseconds=True)
+
+    def get_category(self, i):
+
+        "Return the category of fragment 'i'."
+
+        parent = self.fragment_parents[i]
+
+        if parent == -1:
+            return None
+
+        return Category(self.parents[parent],
+                        self.categories[self.fragment_categories[i]])
+
+    def get_term_ids(self, i):
+
+        "Return an array of the term identifiers of fragment 'i'."
+
+        return self.term_ids[self.term_offsets[i]:self.term_offsets[i+1]]
+
+    def get_terms(self, i):
+
+        "Return a list of the terms of fragment 'i'."
+
+        return list(map(self.get_term, self.get_term_ids(i)))
+
+    def get_text(self, i):
+
+        "Return the text of fragment 'i'."
+
+        if not self.text_present[i]:
+            return None
+
+        self.commit_text()
+        return self.text[self.text_offsets[i]:self.text_offsets[i+1]]
+
+    def get_fragment(self, i):
+
+        "Return fragment 'i'."
+
+        return Fragment(self.get_source(i), self.get_category(i),
+                        self.get_terms(i), self.get_text(i))
+
+    def get_fragments(self):
+
+        "Return a list of all fragments."
+
+        return list(self)
+
+    # Column scans.
+
+    def word_frequencies(self):
+
+        """
+        Return term frequencies for all fragments, equivalent to those produced
+        by the 'word_frequencies' function in the objects module.
+        """
+
+        counts = Counter(self.term_ids)
+        d = CountingDict()
+
+        for i in range(0, len(self.terms)):
+            d[self.get_term(i)] += counts[i]
+
+        return d
+
+    def word_document_frequencies(self):
+
+        """
+        Return term document frequencies for all fragments, equivalent to those
+        produced by the 'word_document_frequencies' function in the objects
+        module.
+        """
+
+        counts = Counter()
+        term_ids = self.term_ids
+        term_classes = self.term_classes
+        offsets = self.term_offsets
+
+        for i in range(0, len(self)):
+            counts.update(set(map(term_classes.__getitem__,
+                                  term_ids[offsets[i]:offsets[i+1]])))
+
+        d = CountingDict()
+
+        for j, term_id in enumerate(self.class_terms):
+            if counts[j]:
+                d[self.get_term(term_id)] = counts[j]
+
+        return d
+
+# Persistence.
+
+def get_stored_fragments(filename):
+
+    "Return the fragment store retained in 'filename'."
+
+    f = open(filename, "rb")
+    try:
+        return pickle.load(f)
+    finally:
+        f.close()
+
+def show_stored_fragments(fragments, filename):
+
+    "Retain 'fragments' in a fragment store in 'filename'."
+
+    f = open(filename, "wb")
+    try:
+        pickle.dump(FragmentStore(fragments), f, pickle.HIGHEST_PROTOCOL)
+    finally:
+        f.close()
+
+def get_restored_store(store_filename, fragments_filename):
+
+    """
+    Return the fragment store retained in 'store_filename' if it was written
+    after 'fragments_filename' was written and can be read, or None otherwise.
+    """
+
+    if exists(store_filename) and \
+       getmtime(store_filename) >= getmtime(fragments_filename):
+
+        # Stores written by other versions of the software may not be usable.
+
+        try:
+            return get_stored_fragments(store_filename)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError,
+                OSError):
+            pass
+
+    return None
+
+def get_restored_fragments(store_filename, fragments_filename):
+
+    """
+    Return the fragments retained in 'store_filename' if it was written after
+    'fragments_filename' was written and can be read, or the fragments from
+    'fragments_filename' otherwise.
+    """
+
+    store = get_restored_store(store_filename, fragments_filename)
+
+    if store is not None:
+        return store.get_fragments()
+
+    return get_serialised_fragments(fragments_filename)
+
+# vim: tabstop=4 expandtab shiftwidth=4
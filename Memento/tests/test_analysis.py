@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8
+
+"""
+Test text analysis support.
+"""
+
+from test_support import set_verbose, show
+from analysis import CachedToken, complete_result, get_batches, \
+                     get_fragments_by_language, init_result, process_doc
+from grouping import TermGrouper
+from objects import Fragment, Source
+
+# Test data.
+
+fragments = [Fragment(Source("data/A1", 0, 1), None, ["uno"]),
+             Fragment(Source("data/B1", 0, 1), None, ["one"]),
+             Fragment(Source("data/A1", 1, 2), None, ["dos"]),
+             Fragment(Source("data/C1", 0, 1), None, ["un"])]
+
+lang_map = {"B1" : "en", "C1" : "fr"}
+
+tokens = [CachedToken("Juan", "PROPN", "Juan", "B"),
+          CachedToken("Pérez", "PROPN", "Pérez", "I"),
+          CachedToken("entra", "VERB", "entrar", "O"),
+          CachedToken("en", "ADP", "en", "O"),
+          CachedToken("Madrid", "PROPN", "Madrid", "B"),
+          CachedToken("Hoy", "ADV", "hoy", "O")]
+
+# Test cases.
+
+def test_languages():
+    groups = get_fragments_by_language(fragments, "es", lang_map)
+
+    show("[lang for lang, l in groups]", [lang for lang, l in groups],
+         ["es", "en", "fr"])
+    show("groups[0][1]", groups[0][1], [fragments[0], fragments[2]])
+    show("groups[1][1]", groups[1][1], [fragments[1]])
+
+    groups = get_fragments_by_language(fragments, "es")
+
+    show("groups", groups, [("es", fragments)])
+
+def test_entities():
+    ops = [init_result, complete_result]
+    terms = process_doc(tokens, ops, True)
+
+    show("list(map(str, terms))", list(map(str, terms)),
+         ["Juan Pérez", "entra", "en", "Madrid", "Hoy"])
+    show("terms[0].tag", terms[0].tag, "PROPN")
+
+    # Title-cased words outside entities are not grouped as names.
+
+    grouper = TermGrouper(names=False)
+    terms = grouper.group_words(process_doc(tokens, ops, True))
+
+    show("list(map(str, terms))", list(map(str, terms)),
+         ["Juan Pérez", "entra", "en", "Madrid", "Hoy"])
+
+def test_batches():
+    show("list(get_batches(range(0, 5), 2))", list(get_batches(range(0, 5), 2)),
+         [[0, 1], [2, 3], [4]])
+    show("list(get_batches([], 2))", list(get_batches([], 2)), [])
+
+def main():
+    test_languages()
+    test_entities()
+    test_batches()
+
+if __name__ == "__main__":
+    set_verbose()
+    main()
+
+# vim: tabstop=4 expandtab shiftwidth=4
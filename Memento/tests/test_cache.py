@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8
+
+"""
+Test the caching of processed data.
+"""
+
+from test_support import set_verbose, show
+from cache import Cache, TokenCache
+from os import listdir
+from os.path import join
+from tempfile import TemporaryDirectory
+
+# Test data.
+
+tokens = [("El", "DET", "el"), ("pollo", "NOUN", "pollo"),
+          ("entra", "VERB", "entrar")]
+
+entity_tokens = [("El", "DET", "el", "O"), ("pollo", "NOUN", "pollo", "O"),
+                 ("entra", "VERB", "entrar", "O")]
+
+# Test cases.
+
+def test_cache():
+    with TemporaryDirectory() as dirname:
+        cache = Cache(dirname)
+        cache.set("0123abcd", ["value"])
+
+        show("cache.get(\"0123abcd\")", cache.get("0123abcd"), ["value"])
+        show("cache.get(\"4567\")", cache.get("4567"), None)
+        show("cache.keys()", cache.keys(), ["0123abcd"])
+
+        # Only files written by the cache are considered and cleared.
+
+        f = open(join(dirname, "notes.txt"), "w")
+        try:
+            f.write("Not cached.")
+        finally:
+            f.close()
+
+        show("cache.keys()", cache.keys(), ["0123abcd"])
+
+        cache.clear()
+
+        show("cache.keys()", cache.keys(), [])
+        show("listdir(dirname)", listdir(dirname), ["notes.txt"])
+
+        try:
+            cache.set("../notes.txt", ["value"])
+        except ValueError:
+            show("cache.set(\"../notes.txt\", ...)", "ValueError", "ValueError")
+        else:
+            show("cache.set(\"../notes.txt\", ...)", None, "ValueError")
+
+def test_token_cache():
+    with TemporaryDirectory() as dirname:
+        filename = join(dirname, "tokens.db")
+
+        cache = TokenCache(filename, "es", "es_core_news_sm-2.0.0")
+        cache.set("El pollo entra", tokens)
+        cache.commit()
+        cache.close()
+
+        cache = TokenCache(filename, "es", "es_core_news_sm-2.0.0")
+        show("cache.get(\"El pollo entra\")", cache.get("El pollo entra"), tokens)
+        show("cache.get(\"El pollo\")", cache.get("El pollo"), None)
+        cache.close()
+
+        # A different model version invalidates the stored tokens.
+
+        cache = TokenCache(filename, "es", "es_core_news_sm-2.3.0")
+        show("cache.get(\"El pollo entra\")", cache.get("El pollo entra"), None)
+        cache.close()
+
+        # Variants of the same model are retained alongside each other.
+
+        cache = TokenCache(filename, "es", "es_core_news_sm-2.3.0", "ner")
+        cache.set("El pollo entra", entity_tokens)
+        cache.commit()
+        cache.close()
+
+        cache = TokenCache(filename, "es", "es_core_news_sm-2.3.0")
+        cache.set("El pollo entra", tokens)
+        cache.commit()
+        cache.close()
+
+        cache = TokenCache(filename, "es", "es_core_news_sm-2.3.0", "ner")
+        show("cache.get(\"El pollo entra\")", cache.get("El pollo entra"), entity_tokens)
+        cache.close()
+
+def main():
+    test_cache()
+    test_token_cache()
+
+if __name__ == "__main__":
+    set_verbose()
+    main()
+
+# vim: tabstop=4 expandtab shiftwidth=4
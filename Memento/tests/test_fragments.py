@@ -6,7 +6,7 @@ Test the fragment abstraction.
 """
 
 from test_support import set_verbose, show
-from objects import Category, Fragment, Source
+from objects import Category, Fragment, Source, get_term
 
 # Test data.
 
@@ -66,6 +66,32 @@ def test_mapping():
     show("d.get(%r)" % f3, d.get(f3), "f3")
     show("d.get(%r)" % f4, d.get(f4), "f3")
 
+def test_sources():
+    s1 = Source("A1", "1.234", "3.456")
+    s2 = Source("A1", 1.234, 3.456)
+    s3 = Source("A1", 1234, 3456, milliseconds=True)
+
+    show("%r == %r" % (s1, s2), s1 == s2, True)
+    show("%r == %r" % (s1, s3), s1 == s3, True)
+    show("hash(%r) == hash(%r)" % (s1, s2), hash(s1) == hash(s2), True)
+    show("str(%r)" % s1, str(s1), "A1:1.234-3.456")
+    show("%r < %r" % (s1, f2.source), s1 < f2.source, True)
+
+def test_terms():
+    term = get_term("casa", "NOUN", "casa")
+
+    show("get_term(\"casa\", \"NOUN\", \"casa\") is term",
+         get_term("casa", "NOUN", "casa") is term, True)
+    show("get_term(\"casa\", \"VERB\", \"casar\") is term",
+         get_term("casa", "VERB", "casar") is term, False)
+    show("get_term(\"casas\", \"NOUN\", \"casa\") == \"casa\"",
+         get_term("casas", "NOUN", "casa") == "casa", True)
+    show("sorted([get_term(\"b\"), get_term(\"c\", None, \"a\")])",
+         sorted([get_term("b"), get_term("c", None, "a")]),
+         [get_term("c", None, "a"), get_term("b")])
+    show("hasattr(term, \"__dict__\")", hasattr(term, "__dict__"), False)
+    show("hasattr(f1, \"__dict__\")", hasattr(f1, "__dict__"), False)
+
 def test_truth():
     show("bool(%r)" % f1, bool(f1), True)
     show("bool(%r)" % f2, bool(f2), True)
@@ -81,6 +107,8 @@ def main():
     test_comparison()
     test_contains()
     test_mapping()
+    test_sources()
+    test_terms()
     test_truth()
     test_vector()
 
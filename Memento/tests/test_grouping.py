@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8
+
+"""
+Test the grouping of terms into entities.
+"""
+
+from test_support import set_verbose, show
+from grouping import TermGrouper, group_names, group_quantities, group_words
+from objects import Term
+from stopwords import POSFilter
+
+# Test data.
+
+def get_terms(s):
+    l = []
+    for details in s.split():
+        word, tag = details.split(":")
+        l.append(Term(word, tag, word.lower()))
+    return l
+
+terms = get_terms("""\
+El:DET señor:NOUN Juan:PROPN de:ADP la:DET Cruz:PROPN vive:VERB en:ADP
+Santiago:PROPN de:ADP Chile:PROPN desde:ADP hace:VERB 10:NUM años:NOUN y:CCONJ
+3:NUM 4:NUM días:NOUN con:ADP La:DET Familia:PROPN de:ADP la:DET casa:NOUN
+Del:ADP Mar:PROPN de:ADP 7:NUM horas:NOUN
+""")
+
+posfilter = POSFilter()
+
+# Test cases.
+
+def test_grouping():
+    expected = posfilter.filter_words(group_words(terms))
+    grouped = TermGrouper(tags=posfilter.tags).group_words(terms)
+
+    show("list(map(str, grouped))", list(map(str, grouped)),
+         ["señor", "Juan de la Cruz", "Santiago de Chile", "10 años", "4 días",
+          "Familia", "casa", "Mar", "horas"])
+    show("grouped", grouped, expected)
+
+    show("TermGrouper().group_words(terms)",
+         TermGrouper().group_words(terms), group_words(terms))
+
+def test_configuration():
+    expected = posfilter.filter_words(
+                   group_quantities(group_names(terms, ["y"]), ["horas"]))
+    grouped = TermGrouper(["y"], ["horas"], posfilter.tags).group_words(terms)
+
+    show("list(map(str, grouped))", list(map(str, grouped)),
+         ["señor", "Juan", "Cruz", "Santiago", "Chile", "años", "días",
+          "Familia", "casa", "Mar", "7 horas"])
+    show("grouped", grouped, expected)
+
+def main():
+    test_grouping()
+    test_configuration()
+
+if __name__ == "__main__":
+    set_verbose()
+    main()
+
+# vim: tabstop=4 expandtab shiftwidth=4
@@ -6,9 +6,18 @@ Test fragment construction.
 """
 
 from test_support import set_verbose, show
-from inputs import fill_categorised_fragments, get_categorised_fragments, \
-                   populate_fragments
+from inputs import fill_categorised_fragments, get_aligned_annotations, \
+                   get_categorised_fragments, \
+                   get_categorised_fragments_from_file, \
+                   get_filenames_from_directory, \
+                   get_fragments_from_eaf_file, get_input_filenames, \
+                   get_input_groups, get_slot_bounds, \
+                   populate_fragments, populate_fragments_from_file
 from objects import Category, Source
+from io import BytesIO
+from os import mkdir
+from os.path import join
+from tempfile import TemporaryDirectory
 from xml.dom.minidom import parseString
 
 # Test data.
@@ -50,6 +59,76 @@ text = """\
 </TIERS>
 """
 
+overlapping_tiers = """\
+<TIERS>
+  <TIER columns="Parent">
+    <span start="1.234" end="6.789"><v>Category</v></span>
+  </TIER>
+  <TIER columns="P">
+    <span start="3.456" end="5.678"><v>C</v></span>
+    <span start="5.678" end="13.000"><v>D</v></span>
+  </TIER>
+</TIERS>
+"""
+
+# Produce an ELAN annotation document equivalent to the tiers and text.
+
+def make_eaf(tiers, text):
+    slots = {}
+    l = []
+
+    def slot(value):
+        return slots.setdefault(value, "ts%d" % (len(slots) + 1))
+
+    for doc in (parseString(tiers), parseString(text)):
+        for tier in doc.getElementsByTagName("TIER"):
+            l.append('  <TIER TIER_ID="%s">' % tier.getAttribute("columns"))
+            for span in tier.getElementsByTagName("span"):
+                value = span.getElementsByTagName("v")[0].firstChild.nodeValue
+                l.append('    <ANNOTATION><ALIGNABLE_ANNOTATION ANNOTATION_ID="a%d" '
+                         'TIME_SLOT_REF1="%s" TIME_SLOT_REF2="%s">'
+                         '<ANNOTATION_VALUE>%s</ANNOTATION_VALUE>'
+                         '</ALIGNABLE_ANNOTATION></ANNOTATION>' % (
+                         len(l), slot(span.getAttribute("start")),
+                         slot(span.getAttribute("end")), value))
+            l.append("  </TIER>")
+
+    time_order = ['    <TIME_SLOT TIME_SLOT_ID="%s" TIME_VALUE="%d"/>' % (
+                  name, round(float(value) * 1000)) for value, name in slots.items()]
+
+    return "\n".join(["<ANNOTATION_DOCUMENT>", "  <TIME_ORDER>"] + time_order +
+                     ["  </TIME_ORDER>"] + l + ["</ANNOTATION_DOCUMENT>"])
+
+# An ELAN annotation document with words in tiers subdividing and included in
+# other annotations, employing time slots without time values.
+
+unaligned_eaf = """\
+<ANNOTATION_DOCUMENT>
+  <TIME_ORDER>
+    <TIME_SLOT TIME_SLOT_ID="ts1" TIME_VALUE="1000"/>
+    <TIME_SLOT TIME_SLOT_ID="ts2"/>
+    <TIME_SLOT TIME_SLOT_ID="ts3"/>
+    <TIME_SLOT TIME_SLOT_ID="ts4" TIME_VALUE="4000"/>
+    <TIME_SLOT TIME_SLOT_ID="ts5" TIME_VALUE="5000"/>
+    <TIME_SLOT TIME_SLOT_ID="ts6"/>
+    <TIME_SLOT TIME_SLOT_ID="ts7"/>
+    <TIME_SLOT TIME_SLOT_ID="ts8" TIME_VALUE="8000"/>
+  </TIME_ORDER>
+  <TIER TIER_ID="Parent">
+    <ANNOTATION><ALIGNABLE_ANNOTATION ANNOTATION_ID="a1" TIME_SLOT_REF1="ts1" TIME_SLOT_REF2="ts4"><ANNOTATION_VALUE>Category</ANNOTATION_VALUE></ALIGNABLE_ANNOTATION></ANNOTATION>
+    <ANNOTATION><ALIGNABLE_ANNOTATION ANNOTATION_ID="a2" TIME_SLOT_REF1="ts5" TIME_SLOT_REF2="ts8"><ANNOTATION_VALUE>Other</ANNOTATION_VALUE></ALIGNABLE_ANNOTATION></ANNOTATION>
+  </TIER>
+  <TIER TIER_ID="Words" PARENT_REF="Parent">
+    <ANNOTATION><ALIGNABLE_ANNOTATION ANNOTATION_ID="a3" TIME_SLOT_REF1="ts1" TIME_SLOT_REF2="ts2"><ANNOTATION_VALUE>Un</ANNOTATION_VALUE></ALIGNABLE_ANNOTATION></ANNOTATION>
+    <ANNOTATION><ALIGNABLE_ANNOTATION ANNOTATION_ID="a4" TIME_SLOT_REF1="ts2" TIME_SLOT_REF2="ts3"><ANNOTATION_VALUE>pollo</ANNOTATION_VALUE></ALIGNABLE_ANNOTATION></ANNOTATION>
+    <ANNOTATION><ALIGNABLE_ANNOTATION ANNOTATION_ID="a5" TIME_SLOT_REF1="ts3" TIME_SLOT_REF2="ts4"><ANNOTATION_VALUE>entra</ANNOTATION_VALUE></ALIGNABLE_ANNOTATION></ANNOTATION>
+  </TIER>
+  <TIER TIER_ID="Text" PARENT_REF="Parent">
+    <ANNOTATION><ALIGNABLE_ANNOTATION ANNOTATION_ID="a6" TIME_SLOT_REF1="ts6" TIME_SLOT_REF2="ts7"><ANNOTATION_VALUE>una bellota</ANNOTATION_VALUE></ALIGNABLE_ANNOTATION></ANNOTATION>
+  </TIER>
+</ANNOTATION_DOCUMENT>
+"""
+
 # Test cases.
 
 def test_categorised_fragments():
@@ -90,9 +169,128 @@ def test_populated_fragments():
     show("fragments[2].words[-1]", fragments[2].words[-1], ".")
     show("fragments[4].words", fragments[4].words, ["su", "cabeza"])
 
+def test_overlapping_fragments():
+    fragments = get_categorised_fragments(parseString(overlapping_tiers), "test")
+    filled = fill_categorised_fragments(fragments)
+
+    show("len(filled)", len(filled), 4)
+    show("filled[0].source", filled[0].source, Source("test", 0, 1.234))
+
+    populate_fragments(fragments, parseString(text), "test")
+
+    show("fragments[0].words", fragments[0].words,
+         ["Un", "día", "un", "pollo", "entra"])
+    show("fragments[1].words", fragments[1].words, ["un", "pollo"])
+    show("fragments[2].words", fragments[2].words,
+         ["entra", "en", "un", "bosque", ".", "Una"])
+
+def test_streamed_fragments():
+    expected = get_categorised_fragments(parseString(tiers), "test")
+    expected = fill_categorised_fragments(expected)
+    populate_fragments(expected, parseString(text), "test")
+
+    fragments = get_categorised_fragments_from_file(BytesIO(tiers.encode("utf-8")), "test")
+    fragments = fill_categorised_fragments(fragments)
+    populate_fragments_from_file(fragments, BytesIO(text.encode("utf-8")), "test")
+
+    show("len(fragments)", len(fragments), len(expected))
+
+    show("[f.category for f in fragments]",
+         [f.category for f in fragments], [f.category for f in expected])
+    show("[f.source for f in fragments]",
+         [f.source for f in fragments], [f.source for f in expected])
+    show("[f.words for f in fragments]",
+         [f.words for f in fragments], [f.words for f in expected])
+
+def test_eaf_fragments():
+    expected = get_categorised_fragments(parseString(tiers), "test")
+    expected = fill_categorised_fragments(expected)
+    populate_fragments(expected, parseString(text), "test")
+
+    fragments = get_fragments_from_eaf_file(BytesIO(make_eaf(tiers, text).encode("utf-8")), "test")
+
+    show("len(fragments)", len(fragments), len(expected))
+
+    show("[f.category for f in fragments]",
+         [f.category for f in fragments], [f.category for f in expected])
+    show("[f.source for f in fragments]",
+         [f.source for f in fragments], [f.source for f in expected])
+    show("[f.words for f in fragments]",
+         [f.words for f in fragments], [f.words for f in expected])
+
+def test_eaf_unaligned():
+    fragments = get_fragments_from_eaf_file(BytesIO(unaligned_eaf.encode("utf-8")), "test")
+    categorised = list(filter(lambda f: f.category, fragments))
+
+    show("[f.source for f in categorised]",
+         [f.source for f in categorised],
+         [Source("test", 1, 4), Source("test", 5, 8)])
+    show("[f.words for f in categorised]",
+         [f.words for f in categorised],
+         [["Un", "pollo", "entra"], ["una", "bellota"]])
+
+    # The unaligned slots in each tier are given evenly distributed times.
+
+    order = ["ts1", "ts2", "ts3", "ts4", "ts5", "ts6", "ts7", "ts8"]
+    slots = {"ts1" : 1000, "ts2" : None, "ts3" : None, "ts4" : 4000,
+             "ts5" : 5000, "ts6" : None, "ts7" : None, "ts8" : 8000}
+    bounds = get_slot_bounds(order, slots)
+
+    show("get_aligned_annotations(...)",
+         get_aligned_annotations([("a3", "ts1", "ts2", "Un"),
+                                  ("a4", "ts2", "ts3", "pollo"),
+                                  ("a5", "ts3", "ts4", "entra")],
+                                 slots, bounds),
+         [("a3", 1000, 2000, "Un"), ("a4", 2000, 3000, "pollo"),
+          ("a5", 3000, 4000, "entra")])
+
+    show("get_aligned_annotations(...)",
+         get_aligned_annotations([("a6", "ts6", "ts7", "una bellota")],
+                                 slots, bounds),
+         [("a6", 6000, 7000, "una bellota")])
+
+def test_input_conflicts():
+    filenames = ["data/A1_Text.xml", "data/A1_Tiers.xml", "data/A1.eaf",
+                 "data/B1_Text.xml", "data/B1_Tiers.xml"]
+
+    # ELAN annotation files are preferred to text and tiers files.
+
+    show("get_input_filenames(filenames)", get_input_filenames(filenames),
+         [("data/A1", {"EAF" : "data/A1.eaf"}),
+          ("data/B1", {"Text" : "data/B1_Text.xml",
+                       "Tiers" : "data/B1_Tiers.xml"})])
+
+    # Where groups are generated as files are found, complete groups are
+    # retained.
+
+    show("list(get_input_groups(filenames))", list(get_input_groups(filenames)),
+         [("data/A1", {"Text" : "data/A1_Text.xml",
+                       "Tiers" : "data/A1_Tiers.xml"}),
+          ("data/B1", {"Text" : "data/B1_Text.xml",
+                       "Tiers" : "data/B1_Tiers.xml"})])
+
+def test_directory():
+    with TemporaryDirectory() as dirname:
+        names = ["B1_Tiers.xml", "A1_Text.xml", "B1_Text.xml", "A1_Tiers.xml"]
+
+        for name in names:
+            open(join(dirname, name), "w").close()
+
+        mkdir(join(dirname, "A0_Text.xml"))
+
+        show("list(get_filenames_from_directory(dirname))",
+             list(get_filenames_from_directory(dirname)),
+             list(map(lambda name: join(dirname, name), sorted(names))))
+
 def main():
     test_categorised_fragments()
     test_populated_fragments()
+    test_overlapping_fragments()
+    test_streamed_fragments()
+    test_eaf_fragments()
+    test_eaf_unaligned()
+    test_input_conflicts()
+    test_directory()
 
 if __name__ == "__main__":
     set_verbose()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8
+
+"""
+Test lexicon compilation and analysis.
+"""
+
+from test_support import set_verbose, show
+from analysis import lower_word, stem_word
+from lexicon import LexiconAnalyser, LexiconCompiler, get_agreement
+from objects import Fragment, Source
+from stopwords import POSFilter
+
+# Test data.
+
+texts = [
+    ("Un pollo entra.", [("Un", "DET", "uno"), ("pollo", "NOUN", "pollo"),
+                         ("entra", "VERB", "entrar"), (".", "PUNCT", ".")]),
+    ("La entra.", [("La", "DET", "el"), ("entra", "NOUN", "entra"),
+                   (".", "PUNCT", ".")]),
+    ("El pollo entra", [("El", "DET", "el"), ("pollo", "NOUN", "pollo"),
+                        ("entra", "VERB", "entrar")]),
+    ]
+
+compiler = LexiconCompiler()
+
+for text, tokens in texts:
+    compiler.add_tokens(tokens)
+
+lexicon = compiler.get_lexicon()
+
+# Test cases.
+
+def test_lexicon():
+    show("len(lexicon)", len(lexicon), 6)
+    show("lexicon.get(\"entra\")", lexicon.get("entra"), ("VERB", "entrar"))
+    show("lexicon.get(\"Pollo\")", lexicon.get("Pollo"), ("NOUN", "pollo"))
+    show("lexicon.get(\"gallo\")", lexicon.get("gallo"), None)
+
+def get_details(terms):
+    return list(map(lambda t: (t.word, t.tag, t.normalised), terms))
+
+def test_analyser():
+    fragment = Fragment(Source("test", 0, 1), None,
+                        "Un pollo entra en el bosque .".split())
+    LexiconAnalyser(lexicon).process_fragments([fragment], [stem_word, lower_word])
+
+    show("get_details(fragment.words)", get_details(fragment.words),
+         [("Un", "DET", "Un"), ("pollo", "NOUN", "pollo"),
+          ("entra", "VERB", "entrar"), ("en", "X", "en"),
+          ("el", "X", "el"), ("bosque", "X", "bosque"),
+          (".", "PUNCT", ".")])
+
+    # Words missing from the lexicon are discarded by the default filter but
+    # can be preserved by indicating their tag.
+
+    show("get_details(POSFilter().filter_words(fragment.words))",
+         get_details(POSFilter().filter_words(fragment.words)),
+         [("pollo", "NOUN", "pollo")])
+
+    show("get_details(POSFilter([\"NOUN\", \"X\"]).filter_words(fragment.words))",
+         get_details(POSFilter(["NOUN", "X"]).filter_words(fragment.words)),
+         [("pollo", "NOUN", "pollo"), ("en", "X", "en"),
+          ("el", "X", "el"), ("bosque", "X", "bosque")])
+
+    # Pretokenised analysis retains each word as a single token.
+
+    fragment = Fragment(Source("test", 0, 1), None, ["Un", "pollo", "entra."])
+    LexiconAnalyser(lexicon, True).process_fragments([fragment], [stem_word, lower_word])
+
+    show("get_details(fragment.words)", get_details(fragment.words),
+         [("Un", "DET", "Un"), ("pollo", "NOUN", "pollo"),
+          ("entra.", "X", "entra.")])
+
+def test_agreement():
+    counts, confusion = get_agreement(lexicon, texts)
+
+    show("counts[\"tokenisation\"]", counts["tokenisation"], 3)
+    show("counts[\"tokens\"]", counts["tokens"], 10)
+    show("counts[\"tags\"]", counts["tags"], 9)
+    show("counts[\"lemmas\"]", counts["lemmas"], 9)
+    show("confusion", dict(confusion), {("NOUN", "VERB") : 1})
+
+def main():
+    test_lexicon()
+    test_analyser()
+    test_agreement()
+
+if __name__ == "__main__":
+    set_verbose()
+    main()
+
+# vim: tabstop=4 expandtab shiftwidth=4
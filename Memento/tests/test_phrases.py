@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8
+
+"""
+Test phrase matching and grouping.
+"""
+
+from test_support import set_verbose, show
+from grouping import PhraseGrouper, TermGrouper, group_names
+from objects import Term
+from text import PhraseIndex, match_tokens
+
+# Test data.
+
+words = "el pobre pollo cree que el cielo ha caído sobre el pobre pollo".split()
+
+index = PhraseIndex([["pobre", "pollo"], ["el", "pobre"], ["el", "cielo"],
+                     ["cielo", "ha", "caído"]])
+
+terms = [Term("Juan", "PROPN", "Juan"), Term("Pérez", "PROPN", "Pérez"),
+         Term("vive", "VERB", "vivir"), Term("en", "ADP", "en"),
+         Term("Santiago", "PROPN", "Santiago"), Term("de", "ADP", "de"),
+         Term("Chile", "PROPN", "Chile")]
+
+grouper = PhraseGrouper(["Juan Pérez", "Santiago de Chile", "Chile"])
+
+# Test cases.
+
+def test_find():
+    matches = list(index.find(words))
+
+    show("len(matches)", len(matches), 6)
+    show("matches[0]", matches[0], (0, 2, ("el", "pobre")))
+    show("matches[1]", matches[1], (1, 3, ("pobre", "pollo")))
+    show("matches[3]", matches[3], (6, 9, ("cielo", "ha", "caído")))
+
+    longest = index.find_longest(words)
+
+    show("longest", list(map(lambda m: m[:2], longest)),
+         [(0, 2), (5, 7), (10, 12)])
+
+def test_match_tokens():
+    show("match_tokens(['pobre', 'pollo'], words)",
+         match_tokens(["pobre", "pollo"], words), True)
+    show("match_tokens(['pollo', 'pobre'], words)",
+         match_tokens(["pollo", "pobre"], words), False)
+    show("match_tokens(['cielo'], words)",
+         match_tokens(["cielo"], words), True)
+
+def test_grouping():
+    show("grouper.group_words(terms)", list(map(str, grouper.group_words(terms))),
+         ["Juan Pérez", "vive", "en", "Santiago de Chile"])
+
+def test_name_grouping():
+    terms = [Term("Casa", "PROPN", "Casa"), Term("Blanca", "PROPN", "Blanca"),
+             Term("Juan", "PROPN", "Juan")]
+
+    grouped = PhraseGrouper(["Casa Blanca"]).group_words(terms)
+
+    show("grouped", list(map(lambda t: (t.word, t.tag, t.normalised), grouped)),
+         [("Casa Blanca", "PROPN", "Casa Blanca"), ("Juan", "PROPN", "Juan")])
+
+    # Known phrases are not combined with the names that follow them.
+
+    show("TermGrouper().group_words(grouped)",
+         list(map(str, TermGrouper().group_words(grouped))),
+         ["Casa Blanca", "Juan"])
+    show("group_names(grouped)", list(map(str, group_names(grouped))),
+         ["Casa Blanca", "Juan"])
+    show("TermGrouper(tags=[\"PROPN\"]).group_words(grouped)",
+         list(map(str, TermGrouper(tags=["PROPN"]).group_words(grouped))),
+         ["Casa Blanca", "Juan"])
+
+def main():
+    test_find()
+    test_match_tokens()
+    test_grouping()
+    test_name_grouping()
+
+if __name__ == "__main__":
+    set_verbose()
+    main()
+
+# vim: tabstop=4 expandtab shiftwidth=4
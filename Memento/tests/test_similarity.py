@@ -11,7 +11,9 @@ from objects import Category, Fragment, Source, \
                     inverse_document_frequencies, \
                     process_term_vectors, \
                     word_document_frequencies, word_frequencies
+from similarity import FragmentMatrix, compare_fragments_by_matrix
 from text import only_words
+from vectors import Vocabulary
 import re
 
 # Test data.
@@ -91,6 +93,51 @@ def test_similarity():
          get_fragment_similarity([fragments[2], fragments[-2]]),
          {"el" : 10, "pobre" : 1, "pollo" : 1})
 
+def test_vocabulary():
+    array_fragments = list(map(lambda f: Fragment(f.source, f.category, f.words),
+                               fragments))
+    process_term_vectors(array_fragments, vocabulary=Vocabulary())
+    array_connections = compare_fragments(array_fragments)
+
+    similarity = get_fragment_similarity([array_fragments[2], array_fragments[-2]])
+
+    show("get_fragment_similarity([%r, %r])" % (fragments[2], fragments[-2]),
+         dict(similarity.items()), {"el" : 10, "pobre" : 1, "pollo" : 1})
+    show("len(array_connections)", len(array_connections), len(connections))
+    show("[c.measure() for c in array_connections]",
+         [c.measure() for c in array_connections],
+         [c.measure() for c in connections])
+
+def get_measures(connections):
+    return sorted(map(lambda c: (c.fragments[0].source.key,
+                                 c.fragments[1].source.key, c.measure()),
+                      connections))
+
+def test_matrix():
+    matrix_connections = compare_fragments_by_matrix(fragments, block_size=5)
+
+    show("get_measures(matrix_connections)", get_measures(matrix_connections),
+         get_measures(connections))
+
+    # Compare only selected fragments with the others.
+
+    selected = [fragments[0], fragments[2]]
+    selected_connections = compare_fragments_by_matrix(fragments, selected)
+
+    show("get_measures(selected_connections)",
+         get_measures(selected_connections),
+         get_measures(filter(lambda c: set(c.fragments).intersection(selected),
+                             connections)))
+
+    # Compare the index-based products with the available products.
+
+    matrix = FragmentMatrix(list(map(lambda f: f.vector, fragments)))
+    rows = list(range(0, matrix.num_rows))
+
+    show("sorted(matrix.get_index_products(rows, True))",
+         sorted(matrix.get_index_products(rows, True)),
+         sorted(matrix.get_products(rows, True)))
+
 def test_frequencies():
     show("word_frequencies([%r, %r])" % (fragments[0], fragments[2]),
          word_frequencies([fragments[0], fragments[2]]),
@@ -108,6 +155,8 @@ def test_frequencies():
 
 def main():
     test_similarity()
+    test_vocabulary()
+    test_matrix()
     test_frequencies()
 
 if __name__ == "__main__":
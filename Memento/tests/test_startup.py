@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8
+
+"""
+Test the modules imported when starting programs, reporting the import time of
+each program when run in verbose mode.
+"""
+
+from test_support import set_verbose, show
+from os.path import abspath, dirname
+import subprocess
+import sys
+
+# Test data.
+
+programs = ["build", "explore", "exploremovement", "exploreMovementTunable",
+            "export", "lexicon"]
+
+# Modules only to be imported when needed.
+
+heavy_modules = {"matplotlib", "pydub", "scipy", "spacy", "Stemmer", "thinc"}
+
+topdir = dirname(dirname(abspath(__file__)))
+
+def get_imports(module):
+
+    """
+    Return a tuple of the form (imported, top-level modules, cumulative time)
+    describing the modules imported when importing 'module', with imported
+    indicating whether 'module' itself was successfully imported and with the
+    time being given in microseconds.
+    """
+
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             "import %s" % module],
+                            cwd=topdir, stderr=subprocess.PIPE,
+                            universal_newlines=True)
+
+    modules = set()
+    cumulative = 0
+    imported = False
+
+    for line in result.stderr.split("\n"):
+        if not line.startswith("import time:"):
+            continue
+
+        details = line[len("import time:"):].split("|")
+
+        if len(details) != 3 or not details[1].strip().isdigit():
+            continue
+
+        name = details[2].strip()
+        modules.add(name.split(".")[0])
+
+        if name == module:
+            cumulative = int(details[1])
+            imported = True
+
+    return result.returncode == 0 and imported, modules, cumulative
+
+# Test cases.
+
+def test_startup():
+    for program in programs:
+        imported, modules, cumulative = get_imports(program)
+
+        show("%s imported" % program, imported, True)
+        show("%s (%d us) heavy modules" % (program, cumulative),
+             sorted(modules.intersection(heavy_modules)), [])
+
+def main():
+    test_startup()
+
+if __name__ == "__main__":
+    set_verbose()
+    main()
+
+# vim: tabstop=4 expandtab shiftwidth=4
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8
+
+"""
+Test the columnar fragment store.
+"""
+
+from test_support import set_verbose, show
+from objects import Category, Fragment, Source, get_term, \
+                    word_document_frequencies, word_frequencies
+from outputs import show_fragments
+from store import FragmentStore, get_restored_fragments, get_restored_store, \
+                  show_stored_fragments
+
+from os.path import join
+from tempfile import TemporaryDirectory
+import pickle
+
+# Test data.
+
+t1 = get_term("pollos", "NOUN", "pollo")
+t2 = get_term("pollo", "NOUN", "pollo")
+t3 = get_term("entra", "VERB", "entrar")
+
+fragments = [Fragment(Source("A1_Text.xml", 0, 1), Category("P", "C"),
+                      [t1, t3, t2], "Los pollos entran, el pollo"),
+             Fragment(Source("A1_Text.xml", 1, 2), None, ["Juan Pérez", t2]),
+             Fragment(Source("B1_Text.xml", 0, 1), Category("P", "D"),
+                      [], "")]
+
+# Test cases.
+
+def test_fragments():
+    store = FragmentStore(fragments)
+
+    show("len(store)", len(store), 3)
+    show("list(store.get_term_ids(0))", list(store.get_term_ids(0)), [0, 1, 2])
+    show("list(store.get_term_ids(1))", list(store.get_term_ids(1)), [3, 2])
+    show("store.participants.values", store.participants.values,
+         ["A1", "B1_Text.xml"])
+
+    for i, fragment in enumerate(store):
+        show("store.get_fragment(%d).as_tuple()" % i, fragment.as_tuple(),
+             fragments[i].as_tuple())
+
+    restored = pickle.loads(pickle.dumps(store, pickle.HIGHEST_PROTOCOL))
+
+    show("restored.get_fragments()", list(map(lambda f: f.as_tuple(),
+                                              restored.get_fragments())),
+         list(map(lambda f: f.as_tuple(), fragments)))
+
+def test_frequencies():
+    store = FragmentStore(fragments)
+
+    show("store.word_frequencies()", store.word_frequencies(),
+         word_frequencies(fragments))
+    show("store.word_document_frequencies()", store.word_document_frequencies(),
+         word_document_frequencies(fragments))
+
+def test_restore():
+    with TemporaryDirectory() as dirname:
+        store_filename = join(dirname, "fragments.store")
+        fragments_filename = join(dirname, "fragments.txt")
+
+        # Only fragments with categories and words can be read from a
+        # fragments file.
+
+        categorised = fragments[:1]
+
+        show_fragments(categorised, fragments_filename)
+        show_stored_fragments(categorised, store_filename)
+
+        store = get_restored_store(store_filename, fragments_filename)
+
+        show("len(store)", store and len(store), 1)
+
+        # An unreadable store is ignored in favour of the fragments file.
+
+        f = open(store_filename, "wb")
+        try:
+            f.write(b"not a store")
+        finally:
+            f.close()
+
+        show("get_restored_store(...)",
+             get_restored_store(store_filename, fragments_filename), None)
+
+        restored = get_restored_fragments(store_filename, fragments_filename)
+
+        show("[f.source for f in restored]",
+             list(map(lambda f: f.source, restored)),
+             list(map(lambda f: f.source, categorised)))
+
+def main():
+    test_fragments()
+    test_frequencies()
+    test_restore()
+
+if __name__ == "__main__":
+    set_verbose()
+    main()
+
+# vim: tabstop=4 expandtab shiftwidth=4
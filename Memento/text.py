@@ -20,6 +20,8 @@ You should have received a copy of the GNU General Public License along with
 this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+from collections import deque
+from functools import lru_cache
 import unicodedata
 
 # Word processing functions.
@@ -50,6 +52,8 @@ normalise_accents = lambda l: list(map(_normalise_accents, map(str, l)))
 
 punctuation = "-,;.:?!"
 
+punctuation_table = str.maketrans("", "", punctuation)
+
 def is_punctuation(s):
     for c in s:
         if c not in punctuation:
@@ -57,9 +61,7 @@ def is_punctuation(s):
     return True
 
 def remove_punctuation(s):
-    for c in punctuation:
-        s = s.replace(c, "")
-    return s
+    return s.translate(punctuation_table)
 
 def remove_punctuation_from_word(s):
     result = remove_punctuation(s)
@@ -74,6 +76,40 @@ def remove_punctuation_from_words(terms):
 
     return list(map(remove_punctuation_from_word, terms))
 
+@lru_cache(maxsize=65536)
+def normalise_word(s):
+
+    """
+    Return a tuple of the form (word, term) for 's', where the word has any
+    grave accents converted to acute accents and the term is the word with any
+    punctuation removed. Results are retained for frequently-occurring words.
+    """
+
+    # Only non-ASCII words can need their accents normalising.
+
+    if not s.isascii():
+        s = _normalise_accents(s)
+
+    return s, remove_punctuation_from_word(s)
+
+def normalise_words(words):
+
+    """
+    Normalise 'words' in a single pass, returning a tuple of the form (text,
+    terms) where the text is produced from the words having normalised accents
+    and the terms are those words with any punctuation removed.
+    """
+
+    l = []
+    terms = []
+
+    for word in words:
+        word, term = normalise_word(str(word))
+        l.append(word)
+        terms.append(term)
+
+    return text_from_words(l), terms
+
 def only_words(terms):
 
     "Filter out non-words, principally anything that is punctuation."
@@ -86,32 +122,151 @@ def only_words(terms):
 
 # General text operations.
 
-def match_tokens(tokens, words):
+class PhraseIndex:
 
-    "Match the given 'tokens' consecutively in the collection of 'words'."
+    """
+    An index of phrases, these being sequences of tokens, permitting all
+    occurrences of the phrases to be found in a single pass over a collection
+    of words. This employs the Aho-Corasick algorithm with tokens as symbols.
+    """
+
+    def __init__(self, phrases=None):
+
+        "Initialise the index with any given 'phrases'."
+
+        # For each state, the transitions to other states, the state to be used
+        # upon failing to match, and the phrases matched at the state.
+
+        self.transitions = [{}]
+        self.failures = [0]
+        self.outputs = [[]]
+        self.prepared = True
+
+        for phrase in phrases or []:
+            self.add(phrase)
+
+    def __len__(self):
+        return len(self.transitions)
+
+    def add(self, tokens, value=None):
+
+        """
+        Add the phrase having the given 'tokens', associating 'value' with it.
+        If 'value' is not specified, the tokens themselves are used.
+        """
+
+        tokens = tuple(tokens)
+
+        if not tokens:
+            return
+
+        state = 0
+
+        for token in tokens:
+            next_state = self.transitions[state].get(token)
 
-    to_test = []
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions.append({})
+                self.failures.append(0)
+                self.outputs.append([])
+                self.transitions[state][token] = next_state
 
-    # First, find places where the first token matches.
+            state = next_state
 
-    for i, word in enumerate(words):
-        if tokens[0] == word:
-            to_test.append(i)
+        self.outputs[state].append((len(tokens), value is None and tokens or value))
+        self.prepared = False
 
-    # Then, investigate each of the possible matches.
+    def prepare(self):
 
-    for i in to_test:
-        to_match = tokens[1:]
+        "Define the failure transitions for the index."
 
-        # For each subsequent word, match the next token.
+        queue = deque(self.transitions[0].values())
 
-        for word in words[i+1:]:
-            if word == to_match[0]:
-                del to_match[0]
-                if not to_match:
-                    return True
+        for state in queue:
+            self.failures[state] = 0
+
+        while queue:
+            state = queue.popleft()
+
+            for token, next_state in self.transitions[state].items():
+                queue.append(next_state)
+
+                # Find the longest proper suffix of the phrase ending in this
+                # state that can be continued with the token.
+
+                failure = self.failures[state]
+
+                while failure and token not in self.transitions[failure]:
+                    failure = self.failures[failure]
+
+                failure = self.transitions[failure].get(token, 0)
+
+                self.failures[next_state] = failure
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[failure]
+
+        self.prepared = True
+
+    def find(self, words, key=None):
+
+        """
+        Generate a tuple of the form (start, end, value) for each occurrence of
+        the indexed phrases in 'words', with 'start' and 'end' indicating the
+        position of the phrase in 'words' and 'value' being the value
+        associated with the phrase. If 'key' is specified, it is called with
+        each word to obtain the token to be matched.
+        """
+
+        if not self.prepared:
+            self.prepare()
+
+        transitions = self.transitions
+        failures = self.failures
+        outputs = self.outputs
+        state = 0
+
+        for i, word in enumerate(words):
+            if key:
+                token = key(word)
             else:
-                break
+                token = word
+
+            while state and token not in transitions[state]:
+                state = failures[state]
+
+            state = transitions[state].get(token, 0)
+
+            for length, value in outputs[state]:
+                yield (i + 1 - length, i + 1, value)
+
+    def find_longest(self, words, key=None):
+
+        """
+        Return a list of non-overlapping (start, end, value) tuples for the
+        phrases found in 'words', preferring the earliest and then the longest
+        occurrences. If 'key' is specified, it is called with each word to
+        obtain the token to be matched.
+        """
+
+        matches = list(self.find(words, key))
+        matches.sort(key=lambda m: (m[0], m[0] - m[1]))
+
+        l = []
+        end = 0
+
+        for match in matches:
+            if match[0] >= end:
+                l.append(match)
+                end = match[1]
+
+        return l
+
+def match_tokens(tokens, words):
+
+    "Match the given 'tokens' consecutively in the collection of 'words'."
+
+    for match in PhraseIndex([tokens]).find(words):
+        return True
 
     return False
 
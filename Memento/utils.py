@@ -45,6 +45,8 @@ class Comparable:
 
     "A helper class providing comparison methods."
 
+    __slots__ = ()
+
     def compare(self, op, other):
         return op(self.to_operand(self), self.to_operand(other))
 
@@ -69,6 +71,130 @@ class Comparable:
     def __ne__(self, other):
         return self.compare(operator.ne, other)
 
+class Keyed:
+
+    """
+    A helper class providing comparison and hashing methods using the 'key'
+    attribute of each instance, this typically being a tuple computed once
+    when the instance is initialised.
+    """
+
+    __slots__ = ()
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+    def __le__(self, other):
+        return self.key <= other.key
+
+    def __gt__(self, other):
+        return self.key > other.key
+
+    def __ge__(self, other):
+        return self.key >= other.key
+
+    def __eq__(self, other):
+        try:
+            return self.key == other.key
+        except AttributeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        try:
+            return self.key != other.key
+        except AttributeError:
+            return NotImplemented
+
+    def __hash__(self):
+        return hash(self.key)
+
+class IntervalIndex:
+
+    """
+    An index of intervals supporting the retrieval of all intervals overlapping
+    a given period. The intervals are sorted by their start and held in an
+    implicit balanced tree, with each node recording the greatest end of the
+    intervals in its subtree.
+    """
+
+    def __init__(self, intervals):
+
+        """
+        Initialise the index with 'intervals', each being a tuple of the form
+        (start, end, value).
+        """
+
+        intervals = list(intervals)
+        intervals.sort(key=lambda i: (i[0], i[1]))
+
+        self.starts = [i[0] for i in intervals]
+        self.ends = [i[1] for i in intervals]
+        self.values = [i[2] for i in intervals]
+        self.max_ends = self.ends[:]
+
+        self._init_max_ends(0, len(intervals))
+
+    def __len__(self):
+        return len(self.values)
+
+    def _init_max_ends(self, lo, hi):
+
+        "Record the greatest end for the subtree spanning 'lo' to 'hi'."
+
+        if lo >= hi:
+            return None
+
+        mid = (lo + hi) // 2
+        max_end = self.ends[mid]
+
+        for end in (self._init_max_ends(lo, mid),
+                    self._init_max_ends(mid + 1, hi)):
+            if end is not None and end > max_end:
+                max_end = end
+
+        self.max_ends[mid] = max_end
+        return max_end
+
+    def overlapping(self, start, end):
+
+        """
+        Return the values of the intervals overlapping the period from 'start'
+        to 'end' in order of increasing interval start.
+        """
+
+        l = []
+        self._find(0, len(self.values), start, end, l)
+        return l
+
+    def _find(self, lo, hi, start, end, l):
+
+        """
+        Add to 'l' values from the subtree spanning 'lo' to 'hi' for intervals
+        overlapping 'start' to 'end'.
+        """
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+
+            # Stop if no interval in the subtree ends after the start.
+
+            if self.max_ends[mid] <= start:
+                return
+
+            self._find(lo, mid, start, end, l)
+
+            # Stop if this and subsequent intervals start after the end.
+
+            if self.starts[mid] >= end:
+                return
+
+            if self.ends[mid] > start:
+                l.append(self.values[mid])
+
+            # Continue with the later intervals.
+
+            lo = mid + 1
+
 # Comparison functions.
 
 def cmp(a, b):
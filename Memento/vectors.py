@@ -18,8 +18,196 @@ details.
 
 You should have received a copy of the GNU General Public License along with
 this program.  If not, see <http://www.gnu.org/licenses/>.
+
+----
+
+Term vectors map terms to weights. They are either dictionaries or arrays of
+weights for term identifiers provided by a vocabulary.
 """
 
+from array import array
+from bisect import bisect_left
+from math import fsum
+
+class Vocabulary:
+
+    """
+    A mapping from terms to dense integer identifiers. Terms that compare equal
+    share the same identifier.
+    """
+
+    def __init__(self):
+        self.terms = []
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.terms)
+
+    def get(self, term):
+
+        "Return the identifier of 'term' or None if it is not known."
+
+        return self.ids.get(term)
+
+    def get_id(self, term):
+
+        "Return the identifier of 'term', adding it if necessary."
+
+        i = self.ids.get(term)
+
+        if i is None:
+            i = self.ids[term] = len(self.terms)
+            self.terms.append(term)
+
+        return i
+
+    def get_term(self, i):
+
+        "Return the term having identifier 'i'."
+
+        return self.terms[i]
+
+    def get_vector(self, vector):
+
+        "Return an array-based term vector for the dictionary 'vector'."
+
+        l = list(map(lambda t: (self.get_id(t[0]), t[1]), vector.items()))
+        l.sort()
+
+        return TermVector(array("i", map(lambda t: t[0], l)),
+                          array("d", map(lambda t: t[1], l)), self)
+
+    def get_weights(self, mapping):
+
+        """
+        Return an array of weights indexed by term identifier from 'mapping',
+        having a weight of 1 for each term not found in 'mapping' or having a
+        zero weight.
+        """
+
+        get = mapping.get
+        return array("d", map(lambda term: get(term) or 1, self.terms))
+
+class TermVector:
+
+    """
+    A term vector holding sorted term identifiers and their weights, with a
+    vocabulary providing the terms. Like a dictionary, the vector provides the
+    terms and weights via its 'items' and 'values' methods.
+    """
+
+    __slots__ = ("ids", "weights", "vocabulary", "norm")
+
+    def __init__(self, ids, weights, vocabulary):
+        self.ids = ids
+        self.weights = weights
+        self.vocabulary = vocabulary
+        self.norm = None
+
+    def __contains__(self, term):
+        return self.get_index(term) is not None
+
+    def __getitem__(self, term):
+        i = self.get_index(term)
+
+        if i is None:
+            raise KeyError(term)
+
+        return self.weights[i]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return "TermVector(%r, %r)" % (self.ids, self.weights)
+
+    def as_dict(self):
+
+        "Return a dictionary mapping terms to weights."
+
+        return dict(zip(map(self.vocabulary.get_term, self.ids), self.weights))
+
+    def get_index(self, term):
+
+        "Return the index of 'term' in the vector or None if it is absent."
+
+        i = self.vocabulary.get(term)
+
+        if i is None:
+            return None
+
+        j = bisect_left(self.ids, i)
+
+        if j < len(self.ids) and self.ids[j] == i:
+            return j
+        else:
+            return None
+
+    def items(self):
+        return zip(self.keys(), self.weights)
+
+    def keys(self):
+        return map(self.vocabulary.get_term, self.ids)
+
+    def magnitude(self):
+
+        "Return the magnitude of the vector."
+
+        if self.norm is None:
+            self.norm = fsum(map(lambda w: w ** 2, self.weights)) ** 0.5
+
+        return self.norm
+
+    def scale(self, weights):
+
+        "Scale the vector using 'weights' indexed by term identifier."
+
+        self.weights = array("d", map(lambda t: t[1] * weights[t[0]],
+                                      zip(self.ids, self.weights)))
+        self.norm = None
+
+    def values(self):
+        return self.weights
+
+def combine_array_vectors(vectors):
+
+    """
+    Return the result of combining the given array-based term 'vectors',
+    retaining the terms present in all vectors with the products of their
+    weights.
+    """
+
+    result = vectors[0]
+
+    for vector in vectors[1:]:
+        ids = array("i")
+        weights = array("d")
+
+        ids1, weights1 = result.ids, result.weights
+        ids2, weights2 = vector.ids, vector.weights
+        n1, n2 = len(ids1), len(ids2)
+        i = j = 0
+
+        # Merge the sorted identifiers, retaining those in both vectors.
+
+        while i < n1 and j < n2:
+            id1 = ids1[i]
+            id2 = ids2[j]
+
+            if id1 < id2:
+                i += 1
+            elif id2 < id1:
+                j += 1
+            else:
+                ids.append(id1)
+                weights.append(weights1[i] * weights2[j])
+                i += 1
+                j += 1
+
+        result = TermVector(ids, weights, result.vocabulary)
+
+    return result
+
 def combine_term_vectors(vectors):
 
     "Return the result of combining the given term 'vectors'."
@@ -27,6 +215,9 @@ def combine_term_vectors(vectors):
     if not vectors:
         return {}
 
+    if isinstance(vectors[0], TermVector):
+        return combine_array_vectors(vectors)
+
     d = {}
 
     for term, value in vectors[0].items():
@@ -39,7 +230,7 @@ def combine_term_vectors(vectors):
 
             # Remove absent terms from the result.
 
-            if not vector.has_key(term):
+            if term not in vector:
                 del d[term]
 
             # Combine term values with the result.
@@ -54,7 +245,7 @@ def get_term_vector_similarity(vectors, similarity=None):
     "Return the cosine measure computed from the term vectors."
 
     d = similarity or combine_term_vectors(vectors)
-    dp = sum(d.values())
+    dp = fsum(d.values())
     mp = product(list(map(magnitude, vectors)))
     return dp / mp
 
@@ -64,12 +255,10 @@ def magnitude(vector):
 
     "Return the magnitude of 'vector'."
 
-    result = 0
-
-    for term, value in vector.items():
-        result += value ** 2
+    if isinstance(vector, TermVector):
+        return vector.magnitude()
 
-    return float(result) ** 0.5
+    return fsum(map(lambda value: value ** 2, vector.values())) ** 0.5
 
 def product(values):
 